@@ -0,0 +1,4 @@
+"""Benchmarks for the robot. Each module in this package can be run
+with `python -m benchmarks.<module>` from the robot root, see the
+devTasks in robot.yaml.
+"""
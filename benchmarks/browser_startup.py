@@ -0,0 +1,102 @@
+"""Measures the time to the first browser action of a robot run, with
+and without a persistent browser server (`libs.web.browser_server`).
+
+Each run is a new Python process, like a robot run, which creates a
+`Swaglabs` automation and opens a blank page as its first action. The
+benchmark reports, per mode:
+
+ * first action: from creating the automation until the first action
+   has finished, which includes launching or connecting to the browser.
+ * run: the wall time of the whole process, including Python startup
+   and closing the browser.
+
+For the server mode, a browser server is started on --port unless one
+is already running there, and stopped at the end if it was started.
+
+Usage:
+    python -m benchmarks.browser_startup [--runs N] [--port 9222]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+from typing import Dict, List, Optional
+
+from libs.web import browser_server
+
+FIRST_PAGE = "data:text/html,<title>ready</title>"
+
+
+def _child(endpoint: Optional[str]) -> None:
+    from libs.web.swaglabs import Swaglabs
+
+    started = time.perf_counter()
+    if endpoint:
+        browser_server.configure(endpoint)
+    automation = Swaglabs(base_url=FIRST_PAGE, browser_configuration={"headless": True})
+    automation.open()
+    first_action = time.perf_counter() - started
+    automation.close()
+    print(json.dumps({"first_action": first_action}))
+
+
+def _run(endpoint: Optional[str]) -> Dict[str, float]:
+    command = [sys.executable, "-m", "benchmarks.browser_startup", "--child"]
+    if endpoint:
+        command += ["--endpoint", endpoint]
+    started = time.perf_counter()
+    result = subprocess.run(command, capture_output=True, text=True, check=True)
+    run = time.perf_counter() - started
+    measured = json.loads(result.stdout.strip().splitlines()[-1])
+    return {"first_action": measured["first_action"], "run": run}
+
+
+def _start_server(port: int) -> Optional[subprocess.Popen]:
+    if browser_server.is_running(port):
+        return None
+    server = subprocess.Popen(
+        [sys.executable, "-m", "libs.web.browser_server", "--port", str(port)],
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while not browser_server.is_running(port):
+        if server.poll() is not None or time.monotonic() > deadline:
+            server.kill()
+            raise RuntimeError("The browser server did not start.")
+        time.sleep(0.1)
+    return server
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=browser_server.DEFAULT_PORT)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--endpoint", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        _child(args.endpoint)
+        return
+
+    endpoint = f"http://127.0.0.1:{args.port}"
+    server = _start_server(args.port)
+    try:
+        for mode, mode_endpoint in (("launch", None), ("server", endpoint)):
+            runs = [_run(mode_endpoint) for _ in range(args.runs)]
+            first_action = statistics.median(run["first_action"] for run in runs)
+            run = statistics.median(run["run"] for run in runs)
+            print(
+                f"{mode:<7} first action {first_action:8.3f} s   "
+                f"run {run:8.3f} s   (median of {args.runs})"
+            )
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+"""Generates synthetic order data for load testing.
+
+The generator is deterministic for a given seed and writes, in the
+output directory:
+
+ * producer/orders.csv and producer/work-items.json: the input of the
+   producer, in the same shape as devdata/work-items-in/test-input-for-producer.
+ * consumer/work-items.json: the matching input of the consumer, one
+   work item per customer.
+ * reporter/work-items.json: the matching input of the reporter, with
+   mock order numbers.
+
+Rows are produced in blocks of customers and shuffled within each block,
+so customers are interleaved as in a real export while memory stays
+bounded at any scale. The number of rows per customer follows a Pareto
+distribution, where a smaller --skew gives a longer tail of customers
+with many items. A fraction of the rows can carry misspelled item names
+(business errors in the consumer) and a fraction of the customers can
+carry malformed names, such as a single word or stray whitespace.
+
+Usage:
+    python -m benchmarks.generate_orders --rows 100000 --output-dir output/data
+"""
+import argparse
+import csv
+import json
+import random
+
+from contextlib import ExitStack
+from pathlib import Path
+from typing import IO, Any, Dict, Iterator, List, NamedTuple, Optional
+
+CATALOG = (
+    "Sauce Labs Backpack",
+    "Sauce Labs Bike Light",
+    "Sauce Labs Bolt T-Shirt",
+    "Sauce Labs Fleece Jacket",
+    "Sauce Labs Onesie",
+    "Test.allTheThings() T-Shirt (Red)",
+)
+"""The items available on the Swag Labs web site."""
+
+BAD_ITEMS = (
+    "Sauce Labs Onesee",
+    "Sauce Labs Bakpack",
+    "Sauce Labs Bike-Light",
+    "Bread Basket Backpack",
+)
+"""Item names which do not exist on the Swag Labs web site."""
+
+FIRST_NAMES = (
+    "Zoya", "Sol", "Gregg", "Camden", "Ada", "Linus", "Grace", "Alan",
+    "Margaret", "Ken", "Barbara", "Dennis", "Frances", "Edsger", "Radia",
+    "Tim", "Katherine", "John", "Hedy", "Donald",
+)  # fmt: skip
+
+LAST_NAMES = (
+    "Roche", "Heaton", "Arroyo", "Martin", "Lovelace", "Torvalds", "Hopper",
+    "Turing", "Hamilton", "Thompson", "Liskov", "Ritchie", "Allen", "Dijkstra",
+    "Perlman", "Berners-Lee", "Johnson", "Backus", "Lamarr", "Knuth",
+)  # fmt: skip
+
+SCALES = {
+    "1k": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+    "10m": 10_000_000,
+}
+"""Named row counts used by the benchmarks."""
+
+BLOCK_SIZE = 10_000
+"""Number of customers whose rows are shuffled together."""
+
+
+class Customer(NamedTuple):
+    name: str
+    zip_code: str
+    items: List[str]
+
+
+class GeneratorOptions(NamedTuple):
+    rows: int
+    seed: int = 42
+    skew: float = 1.5
+    max_items: int = 6
+    bad_item_rate: float = 0.01
+    malformed_name_rate: float = 0.005
+
+
+def _customer_name(rng: random.Random, index: int, malformed: bool) -> str:
+    first = rng.choice(FIRST_NAMES)
+    last = f"{rng.choice(LAST_NAMES)}-{index:x}"
+    if not malformed:
+        return f"{first} {last}"
+    kind = rng.randrange(4)
+    if kind == 0:
+        # A single word, there is no last name to split off.
+        return f"{first}{index:x}"
+    if kind == 1:
+        return f"  {first}   {last} "
+    if kind == 2:
+        return f'{first} "{last}", Jr.'
+    return f"{first} {last}\t{rng.choice(LAST_NAMES)}"
+
+
+def iter_customers(options: GeneratorOptions) -> Iterator[Customer]:
+    """Yields customers until the requested number of rows is reached.
+
+    Args:
+        options (GeneratorOptions): The generator options.
+    """
+    rng = random.Random(options.seed)
+    rows = 0
+    index = 0
+    while rows < options.rows:
+        count = min(
+            int(rng.paretovariate(options.skew)),
+            options.max_items,
+            options.rows - rows,
+        )
+        items = [
+            (
+                rng.choice(BAD_ITEMS)
+                if rng.random() < options.bad_item_rate
+                else rng.choice(CATALOG)
+            )
+            for _ in range(count)
+        ]
+        malformed = rng.random() < options.malformed_name_rate
+        yield Customer(
+            _customer_name(rng, index, malformed),
+            f"{rng.randrange(1000, 100000)}",
+            items,
+        )
+        rows += count
+        index += 1
+
+
+def iter_blocks(options: GeneratorOptions) -> Iterator[List[Customer]]:
+    """Yields the customers in blocks of up to BLOCK_SIZE customers."""
+    block: List[Customer] = []
+    for customer in iter_customers(options):
+        block.append(customer)
+        if len(block) >= BLOCK_SIZE:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+class _JsonArrayWriter:
+    """Writes a JSON array to a file one element at a time."""
+
+    def __init__(self, file: IO[str]):
+        self._file = file
+        self._count = 0
+        file.write("[")
+
+    def write(self, element: Dict[str, Any]) -> None:
+        self._file.write(",\n" if self._count else "\n")
+        json.dump(element, self._file)
+        self._count += 1
+
+    def close(self) -> None:
+        self._file.write("\n]\n")
+
+
+def generate(options: GeneratorOptions, output_dir: Path) -> Dict[str, int]:
+    """Generates the producer, consumer and reporter inputs.
+
+    Args:
+        options (GeneratorOptions): The generator options.
+        output_dir (Path): The directory to write the data to.
+
+    Returns:
+        dict: The number of rows and customers generated.
+    """
+    for step in ("producer", "consumer", "reporter"):
+        (output_dir / step).mkdir(parents=True, exist_ok=True)
+    (output_dir / "producer" / "work-items.json").write_text(
+        json.dumps([{"payload": {}, "files": {"orders.csv": "orders.csv"}}], indent=4)
+    )
+    rng = random.Random(options.seed + 1)
+    totals = {"rows": 0, "customers": 0}
+    with ExitStack() as stack:
+        csv_file = stack.enter_context(
+            (output_dir / "producer" / "orders.csv").open(
+                "w", encoding="utf-8-sig", newline=""
+            )
+        )
+        consumer = _JsonArrayWriter(
+            stack.enter_context(
+                (output_dir / "consumer" / "work-items.json").open(
+                    "w", encoding="utf-8"
+                )
+            )
+        )
+        reporter = _JsonArrayWriter(
+            stack.enter_context(
+                (output_dir / "reporter" / "work-items.json").open(
+                    "w", encoding="utf-8"
+                )
+            )
+        )
+        writer = csv.writer(csv_file)
+        writer.writerow(["Name", "Item", "Zip"])
+        for block in iter_blocks(options):
+            rows = [
+                (customer.name, item, customer.zip_code)
+                for customer in block
+                for item in customer.items
+            ]
+            rng.shuffle(rows)
+            writer.writerows(rows)
+            totals["rows"] += len(rows)
+            totals["customers"] += len(block)
+            for customer in block:
+                consumer.write(
+                    {
+                        "payload": {
+                            "Name": customer.name,
+                            "Zip": customer.zip_code,
+                            "Items": customer.items,
+                        },
+                        "files": {},
+                    }
+                )
+                reporter.write(
+                    {
+                        "payload": {
+                            "Name": customer.name,
+                            "Items": list(dict.fromkeys(customer.items)),
+                            "OrderNumber": (
+                                f"ON-{rng.randrange(1000):03d}-"
+                                f"{rng.randrange(10_000_000):07d}"
+                            ),
+                        },
+                        "files": {},
+                    }
+                )
+        consumer.close()
+        reporter.close()
+    return totals
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    size = parser.add_mutually_exclusive_group(required=True)
+    size.add_argument("--rows", type=int, help="Number of order rows.")
+    size.add_argument("--scale", choices=sorted(SCALES), help="A named row count.")
+    parser.add_argument("--output-dir", type=Path, required=True)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--skew", type=float, default=1.5)
+    parser.add_argument("--max-items", type=int, default=6)
+    parser.add_argument("--bad-item-rate", type=float, default=0.01)
+    parser.add_argument("--malformed-name-rate", type=float, default=0.005)
+    args = parser.parse_args(argv)
+    options = GeneratorOptions(
+        rows=args.rows if args.rows is not None else SCALES[args.scale],
+        seed=args.seed,
+        skew=args.skew,
+        max_items=args.max_items,
+        bad_item_rate=args.bad_item_rate,
+        malformed_name_rate=args.malformed_name_rate,
+    )
+    totals = generate(options, args.output_dir)
+    print(
+        f"Generated {totals['rows']} rows for {totals['customers']} customers "
+        f"in {args.output_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
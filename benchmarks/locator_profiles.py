@@ -0,0 +1,165 @@
+"""Times the resolution of each Swaglabs locator under the "fast" and
+"robust" locator profiles.
+
+The benchmark logs in to the Swag Labs web site and walks through an
+order. On each page, every locator belonging to that page is resolved
+--repeat times under both profiles with `Locator.count()`, which runs
+the selector engine without any waiting or actionability checks. The
+median time per resolution is printed as a table and written to
+locator_profiles.json in the output directory.
+
+The credentials are read from the AUTOMATION_USERNAME and
+AUTOMATION_PASSWORD environment variables and default to the public
+demo user.
+
+Usage:
+    python -m benchmarks.locator_profiles [--repeat 50] [--headed]
+"""
+import argparse
+import json
+import os
+import statistics
+import time
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from tasks import ARTIFACTS_DIR
+
+from libs.web.swaglabs import DEFAULT_URL, LOCATOR_PROFILES, Swaglabs
+
+PAGES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("login", ("username", "password", "logon_button")),
+    (
+        "inventory",
+        (
+            "menu_button",
+            "close_menu_button",
+            "logout_button",
+            "all_items_link",
+            "cart_button",
+            "cart_badge",
+            "inventory_container",
+            "inventory_items",
+        ),
+    ),
+    ("cart", ("cart_page", "cart_items", "cart_items_container", "checkout_button")),
+    (
+        "checkout information",
+        (
+            "customer_first_name",
+            "customer_last_name",
+            "customer_zip_code",
+            "customer_continue_button",
+        ),
+    ),
+    ("checkout overview", ("order_finish_button",)),
+    ("checkout complete", ("order_confirmation",)),
+)
+"""The locators to time on each page of the order flow, in flow order."""
+
+
+def time_locators(
+    swaglabs: Swaglabs, names: Tuple[str, ...], repeat: int
+) -> List[Dict[str, Any]]:
+    """Times the locators on the current page under every profile.
+
+    Args:
+        swaglabs (Swaglabs): The automation, on the page to measure.
+        names (tuple): The names of the locators to time.
+        repeat (int): The number of resolutions of each locator.
+
+    Returns:
+        list: The median milliseconds and match count of each locator
+            and profile.
+    """
+    results = []
+    for profile in LOCATOR_PROFILES:
+        swaglabs.configure_locators(profile)
+        locators = swaglabs.locators
+        for name in names:
+            locator = locators[name]
+            durations = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                count = locator.count()
+                durations.append(time.perf_counter() - started)
+            results.append(
+                {
+                    "locator": name,
+                    "profile": profile,
+                    "median_ms": round(statistics.median(durations) * 1000, 3),
+                    "matches": count,
+                }
+            )
+    swaglabs.configure_locators("fast")
+    return results
+
+
+def _next_page(swaglabs: Swaglabs, page: str, username: str, password: str) -> None:
+    """Moves the automation to the given page of the order flow."""
+    if page == "login":
+        swaglabs.open()
+    elif page == "inventory":
+        swaglabs.login(username, password)
+        swaglabs.clear_cart()
+        swaglabs.add_item_to_cart("Sauce Labs Backpack")
+    elif page == "cart":
+        swaglabs.go_to_cart()
+    elif page == "checkout information":
+        swaglabs.locators.checkout_button.click()
+    elif page == "checkout overview":
+        swaglabs.locators.customer_first_name.fill("Bench")
+        swaglabs.locators.customer_last_name.fill("Mark")
+        swaglabs.locators.customer_zip_code.fill("12345")
+        swaglabs.locators.customer_continue_button.click()
+    elif page == "checkout complete":
+        swaglabs.locators.order_finish_button.click()
+        swaglabs.locators.order_confirmation.wait_for()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--url", default=DEFAULT_URL)
+    parser.add_argument("--headed", action="store_true", help="Show the browser.")
+    parser.add_argument(
+        "--output-dir", type=Path, default=Path(ARTIFACTS_DIR) / "benchmarks"
+    )
+    args = parser.parse_args(argv)
+    username = os.getenv("AUTOMATION_USERNAME", "standard_user")
+    password = os.getenv("AUTOMATION_PASSWORD", "secret_sauce")
+
+    swaglabs = Swaglabs(
+        base_url=args.url, browser_configuration={"headless": not args.headed}
+    )
+    results = []
+    try:
+        for page, names in PAGES:
+            _next_page(swaglabs, page, username, password)
+            for result in time_locators(swaglabs, names, args.repeat):
+                results.append({"page": page, **result})
+    finally:
+        swaglabs.close()
+
+    medians: Dict[str, Dict[str, float]] = {}
+    for result in results:
+        medians.setdefault(result["locator"], {})[result["profile"]] = result[
+            "median_ms"
+        ]
+    print(f"{'locator':<26} {'fast ms':>9} {'robust ms':>10}")
+    for name, profiles in medians.items():
+        print(f"{name:<26} {profiles['fast']:9.3f} {profiles['robust']:10.3f}")
+    print(
+        f"{'total':<26} {sum(p['fast'] for p in medians.values()):9.3f} "
+        f"{sum(p['robust'] for p in medians.values()):10.3f}"
+    )
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+    results_path = args.output_dir / "locator_profiles.json"
+    results_path.write_text(json.dumps(results, indent=4))
+    print(f"Results written to {results_path}")
+
+
+if __name__ == "__main__":
+    main()
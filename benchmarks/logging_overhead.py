@@ -0,0 +1,127 @@
+"""Measures the logging overhead of processing one order.
+
+The benchmark replays the log calls the consumer and the Swaglabs class
+make for a single order, without a browser, and reports the time spent
+per order for:
+
+ * baseline: robocorp.log called directly with f-strings, as the code
+   did before `libs.perflog` existed.
+ * full: `libs.perflog` in the default full mode.
+ * performance: `libs.perflog` in performance mode.
+
+The log is written to a temporary directory, so the numbers include the
+cost of writing the robocorp.log output.
+
+Usage:
+    python -m benchmarks.logging_overhead [--orders N] [--items N]
+"""
+import argparse
+import tempfile
+import time
+
+from robocorp import log
+
+from libs import perflog
+
+
+def _baseline_order(order: int, items: int) -> None:
+    work_item_id = f"item-{order}"
+    log.info(f"Processing work item {work_item_id}")
+    log.info("Clearing the cart.")
+    log.info("Checking if the cart is empty.")
+    log.info("The cart is already empty.")
+    log.info("Going to the order screen.")
+    log.info(f"Ordering {items} items for Customer {order}")
+    for item in range(items):
+        log.info(f"Ordering the Item {item} item.")
+    log.info(f"Submitting order for work item {work_item_id}")
+    log.info("Submitting the order.")
+    log.info("Checking if the cart is empty.")
+    log.info("Going to the cart.")
+    log.info("Getting the order number.")
+    log.info(f"Order submitted for work item {work_item_id}")
+    log.info("Work item was released with state 'DONE'.")
+
+
+def _perflog_order(order: int, items: int) -> None:
+    work_item_id = f"item-{order}"
+    perflog.info(
+        "Processing work item %s", work_item_id, sample="consumer.process_order"
+    )
+    perflog.info("Clearing the cart.", sample="swaglabs.clear_cart")
+    perflog.info("Checking if the cart is empty.", sample="swaglabs.is_cart_empty")
+    perflog.info("The cart is already empty.", sample="swaglabs.cart_empty")
+    perflog.info("Going to the order screen.", sample="swaglabs.go_to_order_screen")
+    perflog.info(
+        "Ordering %d items for %s",
+        items,
+        f"Customer {order}",
+        sample="consumer.ordering",
+    )
+    for item in range(items):
+        perflog.info(
+            "Ordering the %s item.", f"Item {item}", sample="swaglabs.add_item_to_cart"
+        )
+    perflog.info(
+        "Submitting order for work item %s", work_item_id, sample="consumer.submitting"
+    )
+    perflog.info("Submitting the order.", sample="swaglabs.submit_order")
+    perflog.info("Checking if the cart is empty.", sample="swaglabs.is_cart_empty")
+    perflog.info("Going to the cart.", sample="swaglabs.go_to_cart")
+    perflog.info("Getting the order number.", sample="swaglabs.get_order_number")
+    perflog.info(
+        "Order submitted for work item %s", work_item_id, sample="consumer.submitted"
+    )
+    perflog.summary(
+        "order_processed",
+        work_item=work_item_id,
+        items=items,
+        order_number="ON-123-4567890",
+        reused=False,
+    )
+    perflog.summary(
+        "work_item_released", work_item=work_item_id, state="DONE", seconds=0.0
+    )
+
+
+def _measure(name: str, order_fn, orders: int, items: int) -> float:
+    log.start_task(name, "benchmarks.logging_overhead", __file__, 0)
+    started = time.perf_counter()
+    for order in range(orders):
+        order_fn(order, items)
+    elapsed = time.perf_counter() - started
+    log.end_task(name, "benchmarks.logging_overhead", log.Status.PASS, "")
+    return elapsed / orders * 1_000_000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--orders", type=int, default=10_000)
+    parser.add_argument("--items", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        log.add_log_output(output_dir, max_file_size="10MB", max_files=2)
+        log.start_run("logging-overhead")
+        results = {}
+        perflog.configure(perflog.FULL)
+        results["baseline"] = _measure(
+            "baseline", _baseline_order, args.orders, args.items
+        )
+        results["full"] = _measure("full", _perflog_order, args.orders, args.items)
+        perflog.configure(perflog.PERFORMANCE)
+        results["performance"] = _measure(
+            "performance", _perflog_order, args.orders, args.items
+        )
+        log.end_run("logging-overhead", log.Status.PASS)
+        log.close_log_outputs()
+
+    print(
+        f"Logging overhead per order ({args.orders} orders, {args.items} items each):"
+    )
+    for name, microseconds in results.items():
+        print(f"  {name:<12} {microseconds:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
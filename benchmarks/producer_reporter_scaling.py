@@ -0,0 +1,181 @@
+"""Measures how the producer and reporter tasks scale with input size.
+
+For each requested scale, synthetic data is generated with
+`benchmarks.generate_orders` (and reused on later runs). The streaming
+and grouping code of the producer is first timed on its own, in this
+process: the generated orders.csv is parsed and grouped with
+`libs.order_files`, and the wall time and the peak memory allocated by
+Python (measured with tracemalloc) are recorded as the "group" step.
+
+Then the producer and reporter tasks are run against the data with the
+local file work item adapter, and the wall time and the peak resident
+memory of each task run are recorded. The file adapter of
+robocorp.workitems rewrites the whole output work-items.json every time
+a work item is created, so the producer's time grows with the square of
+the number of customers and is dominated by that I/O, which Control Room
+does not have (about 13 s at 1k rows and 270 s at 10k rows). The tasks
+are therefore only run for scales up to --max-task-rows rows, 10k by
+default, and their times should not be read as the cost of parsing.
+
+Results are printed as a table and written to
+producer_reporter_scaling.json in the output directory.
+
+Usage:
+    python -m benchmarks.producer_reporter_scaling --scales 1k 10k 100k
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import psutil
+
+from tasks import ARTIFACTS_DIR, ROBOT_ROOT
+
+from libs.order_files import group_by_customer, iter_order_rows
+
+from .generate_orders import SCALES, GeneratorOptions, generate
+
+DEFAULT_MAX_TASK_ROWS = 10_000
+"""The largest scale the tasks are run for by default, see the module
+documentation."""
+
+
+def _tree_rss(process: psutil.Process) -> int:
+    rss = 0
+    for member in [process] + process.children(recursive=True):
+        try:
+            rss += member.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return rss
+
+
+def group_orders(orders_path: Path) -> Dict[str, float]:
+    """Parses and groups an order file in this process and measures it.
+
+    Args:
+        orders_path (Path): The order file.
+
+    Returns:
+        dict: The wall time in seconds and peak Python memory in MB.
+    """
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        group_by_customer(iter_order_rows(orders_path))
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"seconds": round(elapsed, 3), "peak_mb": round(peak / (1024 * 1024), 1)}
+
+
+def run_task(task: str, input_path: Path, run_dir: Path) -> Dict[str, float]:
+    """Runs a task with the file work item adapter and measures it.
+
+    Args:
+        task (str): The name of the task.
+        input_path (Path): The work-items.json file to use as input.
+        run_dir (Path): The directory for outputs and logs of the run.
+
+    Returns:
+        dict: The wall time in seconds and peak memory in MB of the run.
+    """
+    run_dir.mkdir(parents=True, exist_ok=True)
+    env = dict(
+        os.environ,
+        RC_WORKITEM_ADAPTER="FileAdapter",
+        RC_WORKITEM_INPUT_PATH=str(input_path),
+        RC_WORKITEM_OUTPUT_PATH=str(run_dir / "work-items.json"),
+        ROBOT_ARTIFACTS=str(run_dir),
+    )
+    command = [
+        sys.executable,
+        "-m",
+        "robocorp.tasks",
+        "run",
+        "tasks",
+        "-t",
+        task,
+        "--output-dir",
+        str(run_dir / "log"),
+    ]
+    started = time.perf_counter()
+    child = subprocess.Popen(
+        command,
+        cwd=ROBOT_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    process = psutil.Process(child.pid)
+    peak = 0
+    while child.poll() is None:
+        try:
+            peak = max(peak, _tree_rss(process))
+        except psutil.NoSuchProcess:
+            break
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - started
+    _, stderr = child.communicate()
+    if child.returncode != 0:
+        raise RuntimeError(
+            f"The {task} task failed with exit code {child.returncode}:\n"
+            f"{stderr.decode(errors='replace')}"
+        )
+    return {"seconds": round(elapsed, 3), "peak_mb": round(peak / (1024 * 1024), 1)}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scales", nargs="+", choices=sorted(SCALES), default=["1k", "10k", "100k"]
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--max-task-rows",
+        type=int,
+        default=DEFAULT_MAX_TASK_ROWS,
+        help="Only run the tasks for scales up to this many rows.",
+    )
+    parser.add_argument(
+        "--output-dir", type=Path, default=Path(ARTIFACTS_DIR) / "benchmarks"
+    )
+    args = parser.parse_args(argv)
+
+    results = []
+    for scale in args.scales:
+        data_dir = args.output_dir / "data" / f"{scale}-seed{args.seed}"
+        if not (data_dir / "reporter" / "work-items.json").exists():
+            print(f"Generating {scale} rows of data in {data_dir}")
+            generate(GeneratorOptions(rows=SCALES[scale], seed=args.seed), data_dir)
+        measurements = [("group", group_orders(data_dir / "producer" / "orders.csv"))]
+        if SCALES[scale] <= args.max_task_rows:
+            for task in ("producer", "reporter"):
+                measured = run_task(
+                    task,
+                    data_dir / task / "work-items.json",
+                    args.output_dir / "runs" / f"{scale}-{task}",
+                )
+                measurements.append((task, measured))
+        for task, measured in measurements:
+            results.append({"scale": scale, "task": task, **measured})
+            print(
+                f"{scale:>5} {task:<9} {measured['seconds']:10.2f} s "
+                f"{measured['peak_mb']:10.1f} MB"
+            )
+
+    results_path = args.output_dir / "producer_reporter_scaling.json"
+    results_path.write_text(json.dumps(results, indent=4))
+    print(f"Results written to {results_path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""This module provides a run deadline for consumers.
+
+The Control Room stops a robot when its step reaches the configured
+timeout, abandoning the work item in progress partway through. A
+consumer that knows its deadline can instead stop taking new work items
+once the time left is shorter than a work item is expected to take, and
+leave them for the next robot.
+
+The expected duration of the next work item is predicted from the
+durations of the most recent work items.
+"""
+import math
+import time
+
+from collections import deque
+from typing import Callable, Deque, Optional
+
+
+class RunDeadline:
+    """Tracks the time left until a run deadline and predicts whether
+    another work item can be finished before it.
+    """
+
+    def __init__(
+        self,
+        budget: Optional[float],
+        initial_estimate: float = 60.0,
+        history: int = 20,
+        safety_factor: float = 1.2,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """Starts the deadline clock.
+
+        Args:
+            budget (float): The time in seconds the run may take from now,
+                or None for no deadline.
+            initial_estimate (float): The predicted duration in seconds of a
+                work item before any work item has been timed.
+            history (int): How many recent durations to base the prediction on.
+            safety_factor (float): The prediction is multiplied by this
+                factor to leave some headroom.
+            clock (callable): The clock to use, mainly for testing.
+        """
+        self._clock = clock
+        self._deadline = clock() + budget if budget is not None else None
+        self._initial_estimate = initial_estimate
+        self._durations: Deque[float] = deque(maxlen=history)
+        self._safety_factor = safety_factor
+
+    @property
+    def remaining(self) -> float:
+        """The time left until the deadline in seconds."""
+        if self._deadline is None:
+            return math.inf
+        return self._deadline - self._clock()
+
+    @property
+    def predicted_duration(self) -> float:
+        """The predicted duration of the next work item in seconds. This
+        is the 90th percentile of the recent durations, multiplied by
+        the safety factor.
+        """
+        if not self._durations:
+            return self._initial_estimate * self._safety_factor
+        durations = sorted(self._durations)
+        index = max(math.ceil(len(durations) * 0.9) - 1, 0)
+        return durations[index] * self._safety_factor
+
+    def record(self, duration: float) -> None:
+        """Records how long a work item took.
+
+        Args:
+            duration (float): The duration in seconds.
+        """
+        self._durations.append(duration)
+
+    def allows(self) -> bool:
+        """Determines whether there is time to take another work item.
+
+        Returns:
+            bool: True if another work item can be finished in time.
+        """
+        if self._deadline is None:
+            return True
+        return self.remaining >= self.predicted_duration
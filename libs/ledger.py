@@ -0,0 +1,175 @@
+"""This module provides a small, crash-safe ledger of order progress.
+
+When a consumer crashes after an order was submitted but before the work
+item was released, the Control Room will hand the same work item out
+again. Without a record of what already happened, the retried work item
+would place the same order a second time. The ledger stores the progress
+of each order in a local SQLite database so that a retried work item can
+skip the work that was already done and still produce the same output.
+
+Entries are keyed by a hash of the work item ID and its payload, so a work
+item whose payload was corrected before being retried is treated as a new
+order.
+
+Note: the ledger only helps if its database file survives between runs.
+On a Control Room worker the artifacts directory is recreated for every
+run, so point the ledger at a persistent location when retries across
+runs must be covered.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+
+from pathlib import Path
+from typing import Any, NamedTuple, Optional, Union
+from typing_extensions import Self
+
+from .errors import ApplicationError
+
+# Stages of an order, in the order they are reached.
+STARTED = "started"
+SUBMITTING = "submitting"
+SUBMITTED = "submitted"
+COMPLETED = "completed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    key TEXT PRIMARY KEY,
+    work_item_id TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    order_number TEXT,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class LedgerError(ApplicationError):
+    """Raised when the order ledger cannot be read or written."""
+
+
+class LedgerEntry(NamedTuple):
+    """A single order record stored in the ledger."""
+
+    key: str
+    work_item_id: str
+    stage: str
+    order_number: Optional[str]
+    updated_at: float
+
+    @property
+    def is_submitted(self) -> bool:
+        """True if the order was confirmed by the web site."""
+        return self.order_number is not None and self.stage in (SUBMITTED, COMPLETED)
+
+
+def ledger_key(work_item_id: str, payload: Any) -> str:
+    """Creates the ledger key for a work item.
+
+    Args:
+        work_item_id (str): The ID of the work item.
+        payload (Any): The JSON payload of the work item.
+
+    Returns:
+        str: A hex digest identifying the work item and its payload.
+    """
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+    digest = hashlib.sha256()
+    digest.update(work_item_id.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(canonical.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class OrderLedger:
+    """A SQLite backed ledger of order progress. Every write is committed
+    immediately and the database runs in WAL mode with full synchronous
+    writes, so a record survives the process crashing right after it was
+    written.
+
+    The ledger can be used as a context manager to ensure the database is
+    closed when the consumer is done.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        """Opens (and creates if needed) the ledger database.
+
+        Args:
+            path (str | Path): The path of the SQLite database file.
+
+        Raises:
+            LedgerError: Raised if the database cannot be opened.
+        """
+        self.path = Path(path)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(str(self.path))
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=FULL")
+            with self._connection:
+                self._connection.execute(_SCHEMA)
+        except sqlite3.Error as e:
+            raise LedgerError(f"Failed to open the order ledger at {self.path}.") from e
+
+    def get(self, key: str) -> Optional[LedgerEntry]:
+        """Gets the ledger entry for the given key.
+
+        Args:
+            key (str): The key created by `ledger_key`.
+
+        Returns:
+            LedgerEntry: The entry, or None if the order is unknown.
+        """
+        try:
+            row = self._connection.execute(
+                "SELECT key, work_item_id, stage, order_number, updated_at "
+                "FROM orders WHERE key = ?",
+                (key,),
+            ).fetchone()
+        except sqlite3.Error as e:
+            raise LedgerError("Failed to read from the order ledger.") from e
+        return LedgerEntry(*row) if row is not None else None
+
+    def record(
+        self,
+        key: str,
+        work_item_id: str,
+        stage: str,
+        order_number: Optional[str] = None,
+    ) -> None:
+        """Records the progress of an order. An order number, once
+        recorded, is never cleared by a later call without one.
+
+        Args:
+            key (str): The key created by `ledger_key`.
+            work_item_id (str): The ID of the work item.
+            stage (str): The stage the order has reached.
+            order_number (str): The order number, if the order was submitted.
+
+        Raises:
+            LedgerError: Raised if the record cannot be written.
+        """
+        try:
+            with self._connection:
+                self._connection.execute(
+                    "INSERT INTO orders "
+                    "(key, work_item_id, stage, order_number, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET "
+                    "stage = excluded.stage, "
+                    "order_number = COALESCE(excluded.order_number, orders.order_number), "
+                    "updated_at = excluded.updated_at",
+                    (key, work_item_id, stage, order_number, time.time()),
+                )
+        except sqlite3.Error as e:
+            raise LedgerError("Failed to write to the order ledger.") from e
+
+    def close(self) -> None:
+        """Closes the ledger database."""
+        self._connection.close()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
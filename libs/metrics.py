@@ -0,0 +1,282 @@
+"""This module provides a minimal metrics subsystem for the robot.
+
+It counts processed work items and failures by error class, and keeps
+latency histograms of work items and web actions. The metrics are
+written to a text file in the Prometheus text format, periodically and
+when the process exits, so a locally running node exporter (with its
+textfile collector) can scrape them.
+
+Failures are labelled with the class of the error and its kind, which is
+"business" or "application" for errors deriving from the bases in
+`libs.errors`, and "unexpected" for any other exception.
+
+For example:
+
+    metrics.start_export("metrics.prom", task="consumer")
+    for work_item in workitems.inputs:
+        with work_item:
+            with metrics.track_work_item():
+                ...
+"""
+import atexit
+import math
+import os
+import threading
+import time
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from robocorp.workitems import ApplicationException, BusinessException
+
+PREFIX = "robot"
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+"""Histogram buckets in seconds for work item and action durations."""
+
+_Labels = Tuple[Tuple[str, str], ...]
+
+
+def _format_labels(labels: _Labels) -> str:
+    if not labels:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in labels
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Counter:
+    """A counter with labels. Its samples are named after the counter
+    with a _total suffix."""
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._values: Dict[_Labels, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self._values.get(tuple(sorted(labels.items())), 0.0)
+
+    def expose(self) -> List[str]:
+        # The Prometheus text format types the sample name itself, unlike
+        # OpenMetrics which types the counter without the _total suffix.
+        name = f"{self.name}_total"
+        lines = [f"# HELP {name} {self.help_text}", f"# TYPE {name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    """A histogram with labels and fixed buckets."""
+
+    def __init__(
+        self, name: str, help_text: str, buckets: Sequence[float] = DURATION_BUCKETS
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self._counts: Dict[_Labels, List[int]] = {}
+        self._sums: Dict[_Labels, float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        counts = self._counts.setdefault(key, [0] * len(self.buckets))
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[index] += 1
+        self._sums[key] = self._sums.get(key, 0.0) + value
+
+    def count(self, **labels: str) -> int:
+        counts = self._counts.get(tuple(sorted(labels.items())))
+        return counts[-1] if counts else 0
+
+    def expose(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labels, counts in sorted(self._counts.items()):
+            for bound, count in zip(self.buckets, counts):
+                bucket_labels = labels + (("le", _format_value(bound)),)
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(bucket_labels)} {count}"
+                )
+            lines.append(f"{self.name}_count{_format_labels(labels)} {counts[-1]}")
+            lines.append(
+                f"{self.name}_sum{_format_labels(labels)} "
+                f"{_format_value(self._sums[labels])}"
+            )
+        return lines
+
+
+class Registry:
+    """The metrics of the robot. All updates and exports hold the
+    registry lock, so metrics can be exported from a background thread.
+    """
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.task = ""
+        self.work_items = Counter(
+            f"{PREFIX}_work_items", "Work items processed, by task and final state."
+        )
+        self.failures = Counter(
+            f"{PREFIX}_work_item_failures",
+            "Work items that failed, by task, error kind and error class.",
+        )
+        self.work_item_duration = Histogram(
+            f"{PREFIX}_work_item_duration_seconds",
+            "Time spent processing a work item, by task.",
+        )
+        self.action_duration = Histogram(
+            f"{PREFIX}_action_duration_seconds",
+            "Time spent in a web action, by task and action.",
+        )
+
+    def expose(self) -> str:
+        with self.lock:
+            lines: List[str] = []
+            for metric in (
+                self.work_items,
+                self.failures,
+                self.work_item_duration,
+                self.action_duration,
+            ):
+                lines += metric.expose()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def error_kind(error: BaseException) -> str:
+    """Returns the kind of an error: "business", "application" or
+    "unexpected"."""
+    if isinstance(error, BusinessException):
+        return "business"
+    if isinstance(error, ApplicationException):
+        return "application"
+    return "unexpected"
+
+
+@contextmanager
+def track_work_item() -> Iterator[None]:
+    """Counts and times the processing of one work item. Exceptions are
+    counted by class and kind and then re-raised.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        with REGISTRY.lock:
+            REGISTRY.work_items.inc(task=REGISTRY.task, state="failed")
+            REGISTRY.failures.inc(
+                task=REGISTRY.task, kind=error_kind(e), error=type(e).__name__
+            )
+            REGISTRY.work_item_duration.observe(
+                time.perf_counter() - started, task=REGISTRY.task
+            )
+        raise
+    with REGISTRY.lock:
+        REGISTRY.work_items.inc(task=REGISTRY.task, state="done")
+        REGISTRY.work_item_duration.observe(
+            time.perf_counter() - started, task=REGISTRY.task
+        )
+
+
+def count_work_items(state: str, amount: int = 1) -> None:
+    """Counts work items which are not tracked one by one, such as the
+    output work items created by a producer.
+
+    Args:
+        state (str): The state label, for example "created".
+        amount (int): The number of work items.
+    """
+    with REGISTRY.lock:
+        REGISTRY.work_items.inc(amount, task=REGISTRY.task, state=state)
+
+
+def observe_action(action: str, seconds: float) -> None:
+    """Records the duration of a web action.
+
+    Args:
+        action (str): The name of the action.
+        seconds (float): The duration in seconds.
+    """
+    with REGISTRY.lock:
+        REGISTRY.action_duration.observe(seconds, task=REGISTRY.task, action=action)
+
+
+class Exporter:
+    """Writes the registry to a file periodically in a background thread
+    and once more when stopped. The file is replaced atomically, so a
+    scraper never reads a partially written file.
+    """
+
+    def __init__(self, path: Union[str, Path], interval: float = 15.0):
+        self.path = Path(path)
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-exporter", daemon=True
+        )
+
+    def write(self) -> None:
+        """Writes the current metrics to the file."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary_path = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        temporary_path.write_text(REGISTRY.expose(), encoding="utf-8")
+        os.replace(temporary_path, self.path)
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self.interval):
+            self.write()
+
+    def start(self) -> None:
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self) -> None:
+        """Stops the periodic export and writes the final metrics."""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        self._thread.join()
+        self.write()
+
+
+_exporter: Optional[Exporter] = None
+
+
+def start_export(path: Union[str, Path], task: str, interval: float = 15.0) -> Exporter:
+    """Starts exporting the metrics of a task. Metrics are written every
+    `interval` seconds and when the process exits.
+
+    Args:
+        path (str | Path): The path of the metrics file.
+        task (str): The name of the task, used as the task label.
+        interval (float): Seconds between writes.
+
+    Returns:
+        Exporter: The running exporter.
+    """
+    global _exporter
+    if _exporter is not None:
+        _exporter.stop()
+    REGISTRY.task = task
+    _exporter = Exporter(path, interval)
+    _exporter.start()
+    return _exporter
@@ -0,0 +1,238 @@
+"""This module reads order files, such as the orders.csv attached to the
+producer's input work item, and groups their rows by customer.
+
+Rows are streamed from the file, or from an open binary file such as
+one returned by `libs.workitem_files.open_file`, so neither the file nor
+a table of its rows is held in memory. CSV files are read with the csv
+module and Excel workbooks (.xlsx) with the read-only row iterator of
+openpyxl. The grouped customers still keep the item of every row, so
+memory use grows with the number of rows as well as the number of
+customers: grouping the 500,000 rows (25 MB of CSV, 273,490 customers)
+generated by `benchmarks.generate_orders` with the default options
+allocates about 145 MB, as measured with tracemalloc, or roughly 300
+bytes per row. The customers of every file read by `read_order_files`
+are merged in memory too, so splitting a file does not lower the limit,
+which is set by the memory available to the robot.
+
+Several order files, such as regional exports, can be read in parallel
+with `read_order_files`, which merges customers that appear in more than
+one file.
+
+Every order file must have a header row with the columns Name, Item
+and Zip, in any order. Other columns are ignored.
+"""
+import csv
+import io
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from openpyxl import load_workbook
+
+from .errors import BusinessError
+
+ORDER_FILE_SUFFIXES = (".csv", ".xlsx")
+"""The file types that can be read as order files."""
+REQUIRED_COLUMNS = ("Name", "Item", "Zip")
+
+OrderRow = Dict[str, str]
+OrderSource = Union[str, Path, BinaryIO]
+
+
+class OrderFileError(BusinessError):
+    """Raised when an order file cannot be read as orders."""
+
+
+def _cell_to_text(value: Any) -> str:
+    """Converts a cell value to text, the way it would appear in a CSV."""
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _check_header(header: List[str], name: str) -> None:
+    missing = [column for column in REQUIRED_COLUMNS if column not in header]
+    if missing:
+        raise OrderFileError(
+            f"The order file {name} is missing the columns {', '.join(missing)}."
+        )
+
+
+def _source_name(source: OrderSource) -> str:
+    if isinstance(source, (str, Path)):
+        return Path(source).name
+    return Path(getattr(source, "name", "") or "").name
+
+
+def iter_csv_rows(source: OrderSource) -> Iterator[OrderRow]:
+    """Yields the rows of a CSV order file.
+
+    Args:
+        source (str | Path | BinaryIO): The path of the CSV file, or the
+            file opened in binary mode. An open file is not closed.
+    """
+    with ExitStack() as stack:
+        if isinstance(source, (str, Path)):
+            file = stack.enter_context(
+                Path(source).open(newline="", encoding="utf-8-sig")
+            )
+        else:
+            file = io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+            # Detaching leaves the binary file open for its owner.
+            stack.callback(file.detach)
+        reader = csv.DictReader(file)
+        _check_header(list(reader.fieldnames or []), _source_name(source))
+        for row in reader:
+            yield {column: (row[column] or "").strip() for column in REQUIRED_COLUMNS}
+
+
+def iter_xlsx_rows(source: OrderSource) -> Iterator[OrderRow]:
+    """Yields the rows of the first worksheet of an Excel order file. The
+    workbook is opened read-only, so rows are read as they are iterated.
+
+    Args:
+        source (str | Path | BinaryIO): The path of the .xlsx file, or the
+            file opened in binary mode. An open file must be seekable.
+    """
+    workbook = load_workbook(
+        str(source) if isinstance(source, Path) else source,
+        read_only=True,
+        data_only=True,
+    )
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [_cell_to_text(value) for value in next(rows, ())]
+        _check_header(header, _source_name(source))
+        indexes = {column: header.index(column) for column in REQUIRED_COLUMNS}
+        for values in rows:
+            if not any(value is not None for value in values):
+                continue
+            yield {
+                column: _cell_to_text(values[index]) if index < len(values) else ""
+                for column, index in indexes.items()
+            }
+    finally:
+        workbook.close()
+
+
+def needs_seekable(name: str) -> bool:
+    """Returns whether the order file with the given name is read with
+    random access rather than sequentially.
+
+    Args:
+        name (str): The file name.
+    """
+    return Path(name).suffix.lower() == ".xlsx"
+
+
+def iter_order_rows(
+    source: OrderSource, name: Optional[str] = None
+) -> Iterator[OrderRow]:
+    """Yields the rows of an order file, choosing the reader by the file
+    extension.
+
+    Args:
+        source (str | Path | BinaryIO): The path of the order file, or the
+            file opened in binary mode.
+        name (str, optional): The file name, used for the extension when
+            the source is an open file. Defaults to the name of the source.
+
+    Raises:
+        OrderFileError: Raised if the file type is not supported.
+    """
+    name = name or _source_name(source)
+    suffix = Path(name).suffix.lower()
+    if suffix == ".csv":
+        return iter_csv_rows(source)
+    if suffix == ".xlsx":
+        return iter_xlsx_rows(source)
+    raise OrderFileError(
+        f"The order file {name} is not one of the supported types "
+        f"{', '.join(ORDER_FILE_SUFFIXES)}."
+    )
+
+
+def group_by_customer(rows: Iterable[OrderRow]) -> Dict[str, Dict[str, Any]]:
+    """Groups order rows by customer name, keeping the customers in the
+    order they first appear. The zip code of the first row of each
+    customer is used.
+
+    Args:
+        rows (iterable): The order rows.
+
+    Returns:
+        dict: The work item payloads by customer name, each with the keys
+            Name, Zip and Items.
+    """
+    customers: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        name = row["Name"]
+        customer = customers.get(name)
+        if customer is None:
+            customer = customers[name] = {"Name": name, "Zip": row["Zip"], "Items": []}
+        customer["Items"].append(row["Item"])
+    return customers
+
+
+def merge_customers(groups: Iterable[Dict[str, Dict[str, Any]]]) -> Dict[str, Any]:
+    """Merges customers grouped from several order files. A customer in
+    more than one file gets the items of every file, in the order of the
+    groups, and the zip code of the first group it appears in.
+
+    Args:
+        groups (iterable): The customers of each file, as returned by
+            `group_by_customer`.
+
+    Returns:
+        dict: The merged work item payloads by customer name.
+    """
+    customers: Dict[str, Dict[str, Any]] = {}
+    for group in groups:
+        for name, payload in group.items():
+            customer = customers.get(name)
+            if customer is None:
+                customers[name] = payload
+            else:
+                customer["Items"].extend(payload["Items"])
+    return customers
+
+
+def _read_customers(name: str, path: Path) -> Dict[str, Any]:
+    return group_by_customer(iter_order_rows(path, name))
+
+
+def read_order_files(
+    sources: Iterable[Tuple[str, Path]],
+    max_workers: Optional[int] = None,
+) -> Dict[str, Any]:
+    """Reads several order files in a pool of processes and merges their
+    customers with `merge_customers`, in the order of the sources, so the
+    result does not depend on which file is parsed first.
+
+    The sources are consumed as files are submitted, so a source which is
+    downloaded lazily overlaps with the parsing of the files before it.
+    Only the paths are sent to the worker processes, which read the files
+    themselves.
+
+    Args:
+        sources (iterable): Pairs of file name and local path of the file.
+        max_workers (int, optional): The number of processes. Defaults to
+            the number of CPUs.
+
+    Returns:
+        dict: The merged work item payloads by customer name.
+    """
+    # Spawned processes only import this module, unlike forked ones,
+    # which would inherit the threads and browser of the robot.
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+    ) as executor:
+        futures = [
+            executor.submit(_read_customers, name, path) for name, path in sources
+        ]
+        return merge_customers(future.result() for future in futures)
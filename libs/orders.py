@@ -0,0 +1,138 @@
+"""This module provides the order model shared by the producer, consumer
+and reporter tasks.
+
+An order is validated once, when it is created, so a malformed work item
+payload is rejected with an `InvalidOrderError` (a business error) before
+any work is done for it, rather than failing half way through checkout.
+The payload of an order is the same JSON object used by every step of
+the process, with the keys Name, Items and, depending on the step, Zip
+and OrderNumber:
+
+    order = Order.from_payload(work_item.payload, require_zip=True)
+    ...
+    submitted = Order(order.name, order.items, order_number=order_number)
+    output.payload = submitted.to_payload()
+"""
+from typing import Any, Iterable, Optional, Tuple
+
+from .errors import BusinessError
+
+
+class InvalidOrderError(BusinessError):
+    """Raised when an order payload is missing data or has data of the
+    wrong type."""
+
+
+def split_name(name: str) -> Tuple[str, str]:
+    """Splits a customer name into a first and a last name for the
+    checkout form. The first word is the first name and the remaining
+    words the last name. A name of a single word is used for both, as
+    the checkout form requires both.
+
+    Args:
+        name (str): The customer name.
+
+    Returns:
+        tuple: The first and last name.
+
+    Raises:
+        InvalidOrderError: Raised if the name has no words.
+    """
+    words = name.split()
+    if not words:
+        raise InvalidOrderError(f"The customer name {name!r} is empty.")
+    if len(words) == 1:
+        return words[0], words[0]
+    return words[0], " ".join(words[1:])
+
+
+def _text(value: Any, field: str) -> str:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    if not isinstance(value, str) or not value.strip():
+        raise InvalidOrderError(f"The order field {field} must be non-empty text.")
+    return value.strip()
+
+
+class Order:
+    """An order of a customer.
+
+    Args:
+        name (str): The customer name.
+        items (iterable): The names of the items ordered. Duplicates are
+            dropped, keeping the first of each.
+        zip_code (str, optional): The zip code of the customer.
+        order_number (str, optional): The number of the submitted order.
+
+    Raises:
+        InvalidOrderError: Raised if any of the values is invalid.
+    """
+
+    __slots__ = ("name", "first_name", "last_name", "items", "zip_code", "order_number")
+
+    def __init__(
+        self,
+        name: str,
+        items: Iterable[str],
+        zip_code: Optional[str] = None,
+        order_number: Optional[str] = None,
+    ):
+        self.name = _text(name, "Name")
+        self.first_name, self.last_name = split_name(self.name)
+        if isinstance(items, str):
+            raise InvalidOrderError("The order field Items must be a list.")
+        self.items: Tuple[str, ...] = tuple(
+            dict.fromkeys(_text(item, "Items") for item in items)
+        )
+        if not self.items:
+            raise InvalidOrderError(f"The order of {self.name} has no items.")
+        self.zip_code = None if zip_code is None else _text(zip_code, "Zip")
+        self.order_number = (
+            None if order_number is None else _text(order_number, "OrderNumber")
+        )
+
+    @classmethod
+    def from_payload(cls, payload: Any, require_zip: bool = False) -> "Order":
+        """Creates an order from a work item payload.
+
+        Args:
+            payload (dict): The work item payload.
+            require_zip (bool): Whether the payload must have a zip code.
+
+        Returns:
+            Order: The order.
+
+        Raises:
+            InvalidOrderError: Raised if the payload is not a valid order.
+        """
+        if not isinstance(payload, dict):
+            raise InvalidOrderError("The order payload must be a JSON object.")
+        if require_zip and payload.get("Zip") is None:
+            raise InvalidOrderError("The order payload has no Zip.")
+        items = payload.get("Items")
+        if not isinstance(items, list):
+            raise InvalidOrderError("The order field Items must be a list.")
+        return cls(
+            payload.get("Name"),  # type: ignore
+            items,
+            payload.get("Zip"),
+            payload.get("OrderNumber"),
+        )
+
+    def to_payload(self) -> dict:
+        """Returns the work item payload of the order. Fields without a
+        value are left out."""
+        payload = {"Name": self.name, "Items": list(self.items)}
+        if self.zip_code is not None:
+            payload["Zip"] = self.zip_code
+        if self.order_number is not None:
+            payload["OrderNumber"] = self.order_number
+        return payload
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Order):
+            return NotImplemented
+        return self.to_payload() == other.to_payload()
+
+    def __repr__(self) -> str:
+        return f"Order({self.to_payload()!r})"
@@ -0,0 +1,87 @@
+"""This module provides a thin logging layer over robocorp.log for code
+that runs once or more per work item.
+
+In the default "full" mode every message is logged, just as if
+robocorp.log was called directly. In "performance" mode, messages are
+only formatted when they are actually emitted and repetitive messages,
+identified by a sample key, are only emitted for the first and then
+every Nth occurrence. Warnings and errors are never sampled and the
+per-item summaries are always emitted as structured fields, so the log
+of a high volume run stays both useful and cheap to produce.
+
+The mode is configured by `tasks.setup_log`, see the LOG_MODE setting.
+"""
+import json
+
+from typing import Any, Dict, Optional
+
+from robocorp import log
+
+FULL = "full"
+PERFORMANCE = "performance"
+MODES = (FULL, PERFORMANCE)
+
+_mode = FULL
+_sample_every = 100
+_sample_counts: Dict[str, int] = {}
+
+
+def configure(mode: str = FULL, sample_every: int = 100) -> None:
+    """Configures the logging mode.
+
+    Args:
+        mode (str): Either "full" or "performance".
+        sample_every (int): In performance mode, emit only every Nth
+            occurrence of a sampled message.
+    """
+    global _mode, _sample_every
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}, not {mode}")
+    if sample_every < 1:
+        raise ValueError("sample_every must be at least 1")
+    _mode = mode
+    _sample_every = sample_every
+    _sample_counts.clear()
+
+
+def is_performance_mode() -> bool:
+    """True if the performance logging mode is active."""
+    return _mode == PERFORMANCE
+
+
+def _should_emit(sample: Optional[str]) -> bool:
+    if _mode == FULL or sample is None:
+        return True
+    count = _sample_counts.get(sample, 0)
+    _sample_counts[sample] = count + 1
+    return count % _sample_every == 0
+
+
+def info(message: str, *args: Any, sample: Optional[str] = None) -> None:
+    """Logs an info message. The message is formatted with the
+    %-style args only if it is emitted.
+
+    Args:
+        message (str): The message, optionally with %-style placeholders.
+        args (Any): The values for the placeholders.
+        sample (str): A key identifying a repetitive message. Messages
+            with a key are sampled in performance mode.
+    """
+    if _should_emit(sample):
+        log.info(message % args if args else message)
+
+
+def warn(message: str, *args: Any) -> None:
+    """Logs a warning message. Warnings are never sampled."""
+    log.warn(message % args if args else message)
+
+
+def summary(event: str, **fields: Any) -> None:
+    """Logs a single structured summary line, such as the result of
+    processing one work item. Summaries are never sampled.
+
+    Args:
+        event (str): The name of the event being summarized.
+        fields (Any): The JSON serializable fields of the summary.
+    """
+    log.info(f"{event} {json.dumps(fields, separators=(',', ':'), default=str)}")
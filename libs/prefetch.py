@@ -0,0 +1,136 @@
+"""This module provides an input work item iterator which reserves the
+next work item in the background.
+
+`robocorp.workitems` only allows one input work item to be reserved at
+a time, and reserving one also loads its payload. Iterating
+`robocorp.workitems.inputs` therefore reserves the next work item only
+when the loop comes back around, after everything the consumer does
+between two work items, such as recycling the browser. With
+`PrefetchingInputs`, the consumer calls `prefetch_next` as soon as the
+current work item is released, and the round-trip to the Control Room
+for the next one runs in a background thread while the consumer finishes
+up:
+
+    with PrefetchingInputs(workitems.inputs) as inputs:
+        for work_item in inputs:
+            with work_item:
+                ...
+            inputs.prefetch_next()
+            ...
+
+The first input work item, which the library reserves before the task
+starts (`workitems.inputs.current`), is yielded first. A work item which
+is still unreleased when the consumer is done with it is marked as done,
+just like the standard iterator does. A work item reserved in the
+background but never handed to the consumer, because it stopped early,
+is released as an application error so the Control Room can hand it out
+again.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Iterator, Optional
+from typing_extensions import Self
+
+from robocorp import log
+from robocorp.workitems import EmptyQueue, ExceptionType, Input, Inputs
+
+UNPROCESSED_CODE = "UNPROCESSED"
+"""The error code used to release work items reserved but not processed."""
+
+
+class PrefetchingInputs:
+    """Iterates the input work items, optionally reserving the next one
+    in a background thread, see the module documentation. It should be
+    used as a context manager so the background thread is stopped and an
+    unprocessed work item is released when the consumer is done.
+
+    Args:
+        inputs (Inputs): The input work items, usually
+            `robocorp.workitems.inputs`.
+    """
+
+    def __init__(self, inputs: Inputs):
+        self._inputs = inputs
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional["Future[Optional[Input]]"] = None
+        self._iterating = False
+
+    def _reserve(self) -> Optional[Input]:
+        """Reserves the next work item, which also loads its payload, or
+        returns None when the queue is empty."""
+        try:
+            return self._inputs.reserve()
+        except EmptyQueue:
+            return None
+
+    def _next(self) -> Optional[Input]:
+        """Takes the work item reserved in the background, or reserves
+        the next one now if none was prefetched."""
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return self._reserve()
+        return pending.result()
+
+    def prefetch_next(self) -> None:
+        """Starts reserving the next work item in a background thread.
+        Call it once the current work item is released. Does nothing if
+        the next work item is already being reserved.
+
+        Raises:
+            RuntimeError: Raised if the current work item is not released
+                yet, since only one work item can be reserved at a time.
+        """
+        current = self._inputs.current
+        if current is not None and not current.released:
+            raise RuntimeError(
+                "The next work item can only be prefetched once the current "
+                "one is released."
+            )
+        if self._pending is not None:
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="work-item-prefetch"
+            )
+        self._pending = self._executor.submit(self._reserve)
+
+    def __iter__(self) -> Iterator[Input]:
+        if self._iterating:
+            raise RuntimeError("The input work items can only be iterated once.")
+        self._iterating = True
+        current = self._inputs.current
+        if current is not None and not current.released:
+            item: Optional[Input] = current
+        else:
+            item = self._next()
+        try:
+            while item is not None:
+                yield item
+                if not item.released:
+                    item.done()
+                item = self._next()
+        finally:
+            self.close()
+
+    def close(self) -> None:
+        """Stops prefetching and releases the work item which was reserved
+        in the background but not handed to the consumer, if any.
+        """
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            item = pending.result()
+            if item is not None:
+                log.info(f"Releasing unprocessed work item {item.id}.")
+                item.fail(
+                    exception_type=ExceptionType.APPLICATION,
+                    code=UNPROCESSED_CODE,
+                    message="The work item was reserved but the robot stopped before processing it.",
+                )
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -6,20 +6,35 @@ Note: In many Python use cases, all errors are collected in one module,
 but in this repo, only general errors are included in the errors modules
 and specific errors are defined within each automation module.
 """
+import asyncio
+import functools
+import re
+import time
+
 from abc import ABC, abstractmethod
-from typing import Optional, Mapping, Any
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Mapping, Any, TypeVar, Union
 from typing_extensions import Self
 from prodict import Prodict
 
+import psutil
+
 from playwright.sync_api import (
     Browser as PlaywrightBrowser,
     BrowserContext,
+    Error as PlaywrightError,
     Page,
 )
 
 from robocorp import browser, log
 
+from .. import metrics
 from ..errors import ApplicationError, BusinessError
+from . import browser_server
+from .har import NETWORK_MODES, NetworkArchive
+from .pool import BrowserPool
+from .watchdog import ActionWatchdog, playwright_loop
 
 
 class WebApplicationError(ApplicationError):
@@ -30,6 +45,49 @@ class WebBusinessError(BusinessError):
     """Base class for all web automation business errors."""
 
 
+class WebActionHungError(WebApplicationError):
+    """Raised when a web action passes the hard deadline of the
+    watchdog. The page or context has been rebuilt when this is raised,
+    so the automation can continue with the next work item."""
+
+
+RECYCLE_SCOPES = ("page", "context")
+"""The browser objects that can be recycled, see `configure_recycling`."""
+
+
+def process_memory_mb() -> float:
+    """Returns the resident memory in MB of this Python process and all
+    of its child processes, which includes the Playwright driver and
+    any browser it launched.
+    """
+    process = psutil.Process()
+    rss = process.memory_info().rss
+    for child in process.children(recursive=True):
+        try:
+            rss += child.memory_info().rss
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return rss / (1024 * 1024)
+
+
+_Action = TypeVar("_Action", bound=Callable[..., Any])
+
+
+def web_action(method: _Action) -> _Action:
+    """Decorates a method of a web automation as an action. Actions
+    are tracked by the watchdog configured with `configure_watchdog` and
+    their durations are recorded in `libs.metrics`. Actions called from
+    within another action are part of the outer action and are not
+    tracked separately.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self: "WebAutomationBase", *args, **kwargs):
+        return self._run_action(method.__name__, method, *args, **kwargs)
+
+    return wrapper  # type: ignore
+
+
 class WebAutomationBase(ABC):
     """A base class for web automations. It includes several methods
     and properties which are already implemented but may be overridden,
@@ -44,6 +102,7 @@ class WebAutomationBase(ABC):
         timeout: Optional[float] = None,
         browser_configuration: Optional[Mapping[str, Any]] = None,
         context_configuration: Optional[Mapping[str, Any]] = None,
+        pool: Optional[BrowserPool] = None,
     ):
         """Initializes the web automation.
 
@@ -60,11 +119,33 @@ class WebAutomationBase(ABC):
                 web automation.
             context_configuration: The context configuration to use for the
                 web automation.
+            pool: A browser pool to lease the context of the automation
+                from, to share the browser with other automations, see
+                `libs.web.pool`.
         """
         self._configured = False
+        self._pool = pool
         self.username = None
         self.password = None
         self.base_url = None
+        self.timeout = None
+        self._context_configuration = {}
+        self._context: Optional[BrowserContext] = None
+        self._page: Optional[Page] = None
+        self._recycle_after_items: Optional[int] = None
+        self._recycle_rss_watermark_mb: Optional[float] = None
+        self._recycle_scope = "page"
+        self._items_since_recycle = 0
+        self._watchdog: Optional[ActionWatchdog] = None
+        self._action_depth = 0
+        self._session_lost = False
+        self._trace_directory: Optional[Path] = None
+        self._trace_screenshots = False
+        self._trace_snapshots = False
+        self._traced_context: Optional[BrowserContext] = None
+        self._traced_item: Optional[str] = None
+        self._saved_trace: Optional[Path] = None
+        self._network: Optional[NetworkArchive] = None
         if (
             username is not None
             or password is not None
@@ -131,29 +212,84 @@ class WebAutomationBase(ABC):
             browser.configure(**browser_configuration)
         if context_configuration is not None:
             browser.configure_context(**context_configuration)
-        browser.context().set_default_timeout(timeout)
+            self._context_configuration = dict(context_configuration)
+        self.timeout = timeout
         self._configured = True
+        self.context.set_default_timeout(timeout)
 
     @property
     def browser(self) -> PlaywrightBrowser:
         """The browser instance. Calling this before configuring
         the automation will cause the automation to be configured
         with the default configuration.
+
+        If a browser server was configured with `browser_server.configure`
+        and is running, this is the browser of the server. With a browser
+        pool, this is the shared browser of the pool.
         """
         if self._configured == False:
             self.configure()
-        return browser.browser()
+        if self._pool is not None:
+            return self._pool.browser
+        return browser_server.connected_browser() or browser.browser()
 
     @property
     def context(self) -> BrowserContext:
         """The browser context. Calling this before configuring
         the automation will cause the automation to be configured
         with the default configuration.
+
+        When connected to a browser server or given a browser pool, the
+        automation opens its own context, which is closed by `close`. A
+        context evicted by the pool is replaced here by a new one with the
+        same cookies, storage and URL.
         """
         if self._configured == False:
             self.configure()
+        if self._context is not None:
+            if self._pool is not None:
+                if not self._pool.is_leased(self._context):
+                    self._restore_context()
+                self._pool.touch(self._context)
+            return self._context
+        if self._pool is not None or browser_server.connected_browser() is not None:
+            self._context = self._new_context()
+            return self._context
         return browser.context()
 
+    def _restore_context(self) -> None:
+        """Replaces a context which the pool has closed with a new one,
+        restoring its storage and URL if the pool evicted it."""
+        assert self._pool is not None and self._context is not None
+        evicted = self._pool.restore(self._context)
+        state, url = evicted if evicted is not None else (None, None)
+        log.info("Restoring the browser context evicted from the browser pool.")
+        options = {} if state is None else {"storage_state": state}
+        self._context = self._new_context(**options)
+        self._traced_context = None
+        self._page = self._context.new_page()
+        if url and url != "about:blank":
+            self._page.goto(url)
+
+    def _new_context(self, **options: Any) -> BrowserContext:
+        """Creates a browser context owned by the automation, with the
+        context configuration, the default timeout and the network mode
+        of the automation.
+
+        Args:
+            options: Context options added to the context configuration.
+        """
+        options = {**self._context_configuration, **options}
+        if self._pool is not None:
+            context = self._pool.lease(**options)
+        else:
+            context = self.browser.new_context(**options)
+        if self.timeout is not None:
+            context.set_default_timeout(self.timeout)
+        if self._network is not None:
+            self._network.attach(context)
+        return context
+
     @property
     def page(self) -> Page:
         """The browser page. Calling this before configuring
@@ -162,6 +298,13 @@ class WebAutomationBase(ABC):
         """
         if self._configured == False:
             self.configure()
+        if self._page is not None and not self._page.is_closed():
+            return self._page
+        if self._context is not None:
+            context = self.context
+            if self._page is None or self._page.is_closed():
+                self._page = context.new_page()
+            return self._page
         return browser.page()
 
     class Locators(Prodict):
@@ -194,6 +337,7 @@ class WebAutomationBase(ABC):
         """
         raise NotImplementedError()
 
+    @web_action
     def open(self) -> None:
         """Opens the web site to the base URL.
 
@@ -232,18 +376,382 @@ class WebAutomationBase(ABC):
         """
         raise NotImplementedError()
 
+    def configure_recycling(
+        self,
+        after_work_items: Optional[int] = None,
+        rss_watermark_mb: Optional[float] = None,
+        scope: str = "page",
+    ) -> None:
+        """Configures recycling of the browser page or context for long
+        running automations. Recycling is checked each time
+        `work_item_completed` is called and happens when either limit
+        is reached. Leave both limits as None to disable recycling.
+
+        Args:
+            after_work_items (int): Recycle after this many work items.
+            rss_watermark_mb (float): Recycle when the resident memory of
+                this process and the browser processes exceeds this many MB.
+            scope (str): Either "page" to replace only the page, or
+                "context" to replace the whole browser context.
+        """
+        if scope not in RECYCLE_SCOPES:
+            raise ValueError(
+                f"scope must be one of {', '.join(RECYCLE_SCOPES)}, not {scope}"
+            )
+        self._recycle_after_items = after_work_items
+        self._recycle_rss_watermark_mb = rss_watermark_mb
+        self._recycle_scope = scope
+
+    def work_item_completed(self) -> None:
+        """Notifies the automation that a work item was completed, which
+        recycles the page or context when a configured limit is reached.
+        See `configure_recycling`. With a browser pool, the contexts left
+        idle by other automations are evicted too.
+        """
+        if self._pool is not None:
+            self._pool.evict_idle()
+        self._items_since_recycle += 1
+        if (
+            self._recycle_after_items is not None
+            and self._items_since_recycle >= self._recycle_after_items
+        ):
+            self.recycle(f"{self._items_since_recycle} work items processed")
+        elif self._recycle_rss_watermark_mb is not None:
+            memory_mb = process_memory_mb()
+            if memory_mb > self._recycle_rss_watermark_mb:
+                self.recycle(
+                    f"memory use of {memory_mb:.0f} MB is above the "
+                    f"watermark of {self._recycle_rss_watermark_mb:.0f} MB"
+                )
+
+    def recycle(
+        self,
+        reason: str = "requested",
+        scope: Optional[str] = None,
+        restore_url: bool = True,
+    ) -> None:
+        """Replaces the page, or the context and its page, with a fresh
+        one and returns to the current URL. Cookies and local storage
+        are carried over to a new context, so the session is restored
+        without a new login where the web site allows it.
+
+        Args:
+            reason (str): The reason for recycling, used for logging.
+            scope (str): Either "page" or "context", defaults to the
+                scope set by `configure_recycling`.
+            restore_url (bool): If False, the new page is left blank
+                instead of returning to the current URL.
+        """
+        scope = scope or self._recycle_scope
+        memory_before = process_memory_mb()
+        log.info(f"Recycling the browser {scope}: {reason}.")
+        old_page = self.page
+        url = old_page.url
+        if scope == "context":
+            # Without a pool or browser server this is the context of
+            # robocorp.browser, which is closed as well to free its memory.
+            old_context = self.context
+            state = old_context.storage_state()
+            # Close the old context first, so a full browser pool has room
+            # for the new one.
+            self._save_trace_chunk()
+            old_page.close()
+            old_context.close()
+            new_context = self._new_context(storage_state=state)
+            self._context = new_context
+            self._traced_context = None
+            self._page = new_context.new_page()
+        else:
+            self._page = self.context.new_page()
+            old_page.close()
+        if restore_url and url and url != "about:blank":
+            self._page.goto(url)
+        self._items_since_recycle = 0
+        log.info(
+            f"Recycled the browser {scope}, memory use went from "
+            f"{memory_before:.0f} MB to {process_memory_mb():.0f} MB."
+        )
+
+    def configure_network(
+        self,
+        mode: str = "live",
+        directory: Optional[Union[str, Path]] = None,
+        latency: float = 0.0,
+        name: str = "session",
+    ) -> None:
+        """Configures recording or replaying of the network traffic, see
+        `libs.web.har`. The automation switches to a new context of its
+        own, since routing must be set up when a context is created and
+        a recording is only written when its context is closed.
+
+        Args:
+            mode (str): "live" to use the network, "record" to use the
+                network and record it, or "replay" to answer every request
+                from the recording.
+            directory (str | Path): The directory of the recording.
+                Required unless the mode is "live".
+            latency (float): Milliseconds to delay each replayed request.
+            name (str): The name of the recording in record mode, which
+                must differ between automations recording at once.
+        """
+        if mode not in NETWORK_MODES:
+            raise ValueError(
+                f"mode must be one of {', '.join(NETWORK_MODES)}, not {mode}"
+            )
+        if mode == "live":
+            self._network = None
+            return
+        if directory is None:
+            raise ValueError(f"A directory is required in {mode} mode.")
+        self._network = NetworkArchive(mode, directory, latency, name)
+        self.recycle(f"network {mode} mode", scope="context", restore_url=False)
+
+    def use_isolated_context(
+        self, storage_state: Optional[Union[str, Path, Mapping[str, Any]]] = None
+    ) -> None:
+        """Moves the automation to a new browser context of its own, which
+        shares no cookies, storage or pages with any other automation.
+        The previous context is closed if the automation owned it.
+
+        Args:
+            storage_state (str | Path | mapping): Cookies and storage to
+                start the context with, as saved by the `storage_state`
+                method of another context, for example to reuse a login.
+        """
+        self._save_trace_chunk()
+        if self._context is not None:
+            self._context.close()
+        elif self._page is not None:
+            self._page.close()
+        options = {} if storage_state is None else {"storage_state": storage_state}
+        self._context = self._new_context(**options)
+        self._traced_context = None
+        self._page = self._context.new_page()
+
+    def configure_watchdog(self, deadline: Optional[float]) -> None:
+        """Configures the watchdog for hung actions. When an action runs
+        past the deadline, its browser calls are cancelled, the context
+        is rebuilt and a `WebActionHungError` is raised.
+
+        Args:
+            deadline (float): The hard deadline of a single action in
+                seconds, or None to disable the watchdog.
+        """
+        self._watchdog = ActionWatchdog(deadline) if deadline is not None else None
+
+    def _run_action(
+        self, name: str, method: Callable[..., Any], *args, **kwargs
+    ) -> Any:
+        """Runs an action method under the watchdog and records its
+        duration in the metrics, see `web_action`.
+        """
+        if self._action_depth > 0:
+            return method(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            if self._session_lost:
+                self._run_watched(f"{name} session restore", self._restore_session)
+            return self._run_watched(name, method, self, *args, **kwargs)
+        except asyncio.CancelledError as e:
+            if self._watchdog is None or not self._watchdog.fired:
+                raise
+            cancelled = e
+        finally:
+            metrics.observe_action(name, time.perf_counter() - started)
+        deadline = self._watchdog.deadline
+        try:
+            self._run_watched(f"{name} recovery", self._recover_from_hang, name)
+        except asyncio.CancelledError:
+            if not self._watchdog.fired:
+                raise
+            log.warn(
+                f"Recovering from the hung {name} action also hung, the "
+                "session is restored before the next action."
+            )
+        raise WebActionHungError(
+            f"The {name} action did not finish within {deadline} seconds."
+        ) from cancelled
+
+    def _run_watched(
+        self, name: str, function: Callable[..., Any], *args, **kwargs
+    ) -> Any:
+        """Runs a function as one action under the watchdog, if there is
+        one. Actions called by the function are part of it."""
+        watchdog = self._watchdog
+        self._action_depth += 1
+        try:
+            loop = playwright_loop(self.page) if watchdog is not None else None
+            if watchdog is None or loop is None:
+                return function(*args, **kwargs)
+            with watchdog.watch(name, loop):
+                return function(*args, **kwargs)
+        finally:
+            self._action_depth -= 1
+
+    def _recover_from_hang(self, name: str) -> None:
+        """Moves the automation to a new context after an action hung and
+        logs back in. Nothing is read from the hung context, which may not
+        answer any more, so the new context starts from the base URL
+        without the old cookies and storage. The recovery runs under the
+        watchdog too. If it hangs as well, the automation is left in the
+        new context and logs in before its next action, see
+        `_restore_session`. Subclasses may override this to restore
+        additional state.
+        """
+        log.warn(f"The {name} action hung, rebuilding the browser context.")
+        hung_context, hung_page = self._context, self._page
+        self._session_lost = True
+        self._context = self._new_context()
+        self._page = self._context.new_page()
+        self._items_since_recycle = 0
+        # Stopping the trace chunk would call the hung context too, so the
+        # trace of the work item is dropped with it.
+        if self._traced_context is not None and self._traced_item is not None:
+            log.warn(
+                f"Dropping the trace of {self._traced_item} with the hung "
+                "browser context."
+            )
+        self._traced_context = None
+        try:
+            if hung_context is not None:
+                hung_context.close()
+            elif hung_page is not None:
+                hung_page.close()
+        except PlaywrightError as e:
+            log.warn(f"Failed to close the hung browser context: {e}")
+        self._restore_session()
+
+    def _restore_session(self) -> None:
+        """Opens the base URL and logs back in after the browser context
+        was rebuilt by `_recover_from_hang`."""
+        if self.base_url is not None:
+            self.open()
+        if not self.is_logged_in() and self.username is not None:
+            self.login()
+        self._session_lost = False
+
+    def configure_tracing(
+        self,
+        directory: Optional[Union[str, Path]],
+        screenshots: bool = False,
+        snapshots: bool = False,
+    ) -> None:
+        """Configures failure-only tracing for `trace_work_item`. Traces
+        of successful work items are discarded, only the traces of
+        failed work items are written to the directory.
+
+        Args:
+            directory (str | Path): The directory to write traces of
+                failed work items to, or None to disable tracing.
+            screenshots (bool): Capture screenshots in the trace.
+            snapshots (bool): Capture DOM snapshots in the trace.
+        """
+        self._trace_directory = Path(directory) if directory is not None else None
+        self._trace_screenshots = screenshots
+        self._trace_snapshots = snapshots
+
+    @contextmanager
+    def trace_work_item(self, name: str) -> Iterator[None]:
+        """Traces the browser actions of a single work item. The trace
+        is kept by the browser in a chunk holding only the current work
+        item. It is discarded when the context exits normally and is
+        written to the configured directory when an exception escapes.
+        Does nothing unless tracing was enabled with `configure_tracing`.
+
+        Args:
+            name (str): The name of the work item, used for the trace
+                title and file name.
+        """
+        if self._trace_directory is None:
+            yield
+            return
+        context = self.context
+        if self._traced_context is not context:
+            context.tracing.start(
+                screenshots=self._trace_screenshots,
+                snapshots=self._trace_snapshots,
+            )
+            self._traced_context = context
+        context.tracing.start_chunk(title=name)
+        self._traced_item = name
+        self._saved_trace = None
+        try:
+            yield
+        except BaseException:
+            self._finish_trace(context, name, keep=True)
+            raise
+        self._finish_trace(context, name, keep=False)
+
+    def _finish_trace(self, context: BrowserContext, name: str, keep: bool) -> None:
+        """Ends the trace of a work item, keeping it only if `keep` is
+        set. If the context was replaced during the work item, the trace
+        was already saved by `_save_trace_chunk` and is deleted unless
+        it is kept."""
+        saved, self._saved_trace = self._saved_trace, None
+        self._traced_item = None
+        if saved is not None:
+            if not keep:
+                saved.unlink(missing_ok=True)
+            return
+        if self._traced_context is not context:
+            # The context was closed without saving, its trace is gone.
+            log.warn(
+                f"The trace of {name} was lost when the browser context was replaced."
+            )
+            return
+        self._stop_trace_chunk(context, name, keep)
+
+    def _save_trace_chunk(self) -> None:
+        """Writes out the trace chunk of the work item being traced, if
+        any, before its context is replaced and the trace would be lost.
+        `trace_work_item` deletes it again if the work item succeeds."""
+        context, name = self._traced_context, self._traced_item
+        if context is None or name is None or self._saved_trace is not None:
+            return
+        self._saved_trace = self._stop_trace_chunk(context, name, keep=True)
+        self._traced_context = None
+
+    def _stop_trace_chunk(
+        self, context: BrowserContext, name: str, keep: bool
+    ) -> Optional[Path]:
+        """Stops the current trace chunk, writing it out if `keep` is set.
+
+        Returns:
+            Path: The path of the trace, if it was written.
+        """
+        path = None
+        if keep:
+            assert self._trace_directory is not None
+            self._trace_directory.mkdir(parents=True, exist_ok=True)
+            file_name = re.sub(r"[^\w.-]", "_", name)
+            path = self._trace_directory / f"trace-{file_name}.zip"
+        try:
+            context.tracing.stop_chunk(path=path)
+        except PlaywrightError as e:
+            log.warn(f"Failed to stop the trace of {name}: {e}")
+            return None
+        if path is not None:
+            log.info(f"Saved the trace of {name} to {path}")
+        return path
+
     def close(self) -> None:
         """Logs out and then closes the browser page.
 
         Note: the browser and the context are not closed as required
         by the robocorp-browser framework, see that package for
-        additional information.
+        additional information. A context created by `recycle`, in a
+        browser server, from a browser pool or for `configure_network` is
+        owned by the automation and is closed, which also writes any
+        recording and returns it to the pool.
         """
         log.info("Closing browser.")
         if self.is_logged_in():
             self.logout()
         if self._configured == True:
             self.page.close()
+        if self._context is not None:
+            self._context.close()
+            self._context = None
 
     def __enter__(self) -> Self:
         """Enter the context manager. This will create a browser instance
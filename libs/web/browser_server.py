@@ -0,0 +1,137 @@
+"""This module runs and connects to a persistent local browser server, so
+short robot runs do not each pay for launching a browser.
+
+The server is a Chromium browser with the Chrome DevTools Protocol (CDP)
+enabled, started once and left running:
+
+    python -m libs.web.browser_server --port 9222
+
+A robot run then connects to it over CDP and opens its own isolated
+browser context, which is closed at the end of the run, instead of
+launching a browser. Configure the endpoint before creating a web
+automation, in the same way as robocorp.browser is configured:
+
+    browser_server.configure("http://127.0.0.1:9222")
+    with Swaglabs(...) as swaglabs:
+        ...
+
+If no server answers at the endpoint, a warning is logged and the
+automation launches its own browser through robocorp.browser as usual.
+"""
+import argparse
+import signal
+import sys
+import threading
+import urllib.request
+
+from typing import List, Optional
+
+from playwright.sync_api import Browser, Error as PlaywrightError
+
+from robocorp import browser, log
+
+DEFAULT_PORT = 9222
+CONNECT_TIMEOUT = 5000.0
+"""Milliseconds to wait for the server to accept a connection."""
+
+_endpoint: Optional[str] = None
+_browser: Optional[Browser] = None
+_unavailable = False
+_timeout = CONNECT_TIMEOUT
+
+
+def configure(endpoint: Optional[str], timeout: float = CONNECT_TIMEOUT) -> None:
+    """Sets the CDP endpoint of the browser server to use, such as
+    "http://127.0.0.1:9222", or None to always launch a browser. Any
+    existing connection is dropped.
+
+    Args:
+        endpoint (str): The CDP endpoint of the browser server.
+        timeout (float): Milliseconds to wait for the server to accept
+            the connection.
+    """
+    global _endpoint, _browser, _unavailable, _timeout
+    if _browser is not None and _browser.is_connected():
+        _browser.close()
+    _endpoint = endpoint
+    _browser = None
+    _unavailable = False
+    _timeout = timeout
+
+
+def connected_browser() -> Optional[Browser]:
+    """Returns the browser of the configured server, connecting on first
+    use. Returns None if no server is configured, or if it could not be
+    reached, in which case the connection is not attempted again.
+    """
+    global _browser, _unavailable
+    if _endpoint is None or _unavailable:
+        return None
+    if _browser is not None and _browser.is_connected():
+        return _browser
+    try:
+        _browser = browser.playwright().chromium.connect_over_cdp(
+            _endpoint, timeout=_timeout
+        )
+    except PlaywrightError as e:
+        log.warn(f"No browser server at {_endpoint}, launching a browser instead: {e}")
+        _unavailable = True
+        return None
+    log.info(f"Connected to the browser server at {_endpoint}.")
+    return _browser
+
+
+def is_running(port: int = DEFAULT_PORT, host: str = "127.0.0.1") -> bool:
+    """Returns whether a browser server answers on the given port.
+
+    Args:
+        port (int): The CDP port of the server.
+        host (str): The host of the server.
+    """
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/json/version", timeout=1):
+            return True
+    except OSError:
+        return False
+
+
+def serve(port: int = DEFAULT_PORT, headless: bool = True) -> None:
+    """Launches the browser server and blocks until interrupted. The CDP
+    port only listens on the loopback interface.
+
+    Args:
+        port (int): The CDP port to listen on.
+        headless (bool): Whether to run the browser headless.
+    """
+    # robocorp.browser does not pass launch arguments through, so the
+    # browser is installed if needed and launched with its Playwright
+    # instance directly.
+    browser.install("chromium")
+    server = browser.playwright().chromium.launch(
+        headless=headless,
+        args=[
+            f"--remote-debugging-port={port}",
+            "--remote-debugging-address=127.0.0.1",
+        ],
+    )
+    print(f"Browser server {server.version} listening on http://127.0.0.1:{port}")
+    # Exit normally on SIGTERM too, so the browser is closed at exit.
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Runs a persistent browser server.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--headed", action="store_true", help="Show the browser.")
+    args = parser.parse_args(argv)
+    serve(args.port, headless=not args.headed)
+
+
+if __name__ == "__main__":
+    main()
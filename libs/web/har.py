@@ -0,0 +1,129 @@
+"""This module records the network traffic of a web automation to an
+archive and replays it, so automations can run reproducibly without a
+network connection.
+
+An archive is a directory of HAR files. In record mode, each browser
+context owned by the automation records every request it sends to its
+own HAR file in the directory, named after the recording, which is
+written when the context is closed. Several automations can record to
+the same archive under different names. Use `clear_archive` to start a
+recording afresh. In replay mode, every request of a context is answered
+from all the HAR files of the directory and nothing reaches the network:
+a request not found in the archive is aborted. An optional fixed
+latency is added to each replayed request, which makes timings
+comparable between runs and machines.
+
+    har.clear_archive("output/network")
+    automation.configure_network("record", "output/network")
+    ...
+    automation.configure_network("replay", "output/network", latency=20)
+"""
+from pathlib import Path
+from typing import Union
+
+from playwright.sync_api import (
+    BrowserContext,
+    Error as PlaywrightError,
+    Request,
+    Route,
+)
+
+from robocorp import log
+
+from ..errors import ApplicationError
+
+NETWORK_MODES = ("live", "record", "replay")
+"""The network modes, see `NetworkArchive`."""
+
+
+class NetworkArchiveError(ApplicationError):
+    """Raised when a network archive cannot be replayed."""
+
+
+def clear_archive(directory: Union[str, Path]) -> None:
+    """Removes all recordings from an archive directory.
+
+    Args:
+        directory (str | Path): The archive directory.
+    """
+    for path in Path(directory).glob("*.har"):
+        path.unlink()
+
+
+class NetworkArchive:
+    """Records browser contexts to, or replays them from, a directory of
+    HAR files, see the module documentation.
+
+    Args:
+        mode (str): Either "record" or "replay".
+        directory (str | Path): The archive directory.
+        latency (float): Milliseconds to delay each replayed request.
+        name (str): The name of the recording, used for the names of its
+            HAR files in record mode.
+    """
+
+    def __init__(
+        self,
+        mode: str,
+        directory: Union[str, Path],
+        latency: float = 0.0,
+        name: str = "session",
+    ):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"mode must be either record or replay, not {mode}")
+        self.mode = mode
+        self.directory = Path(directory)
+        self.latency = latency
+        self.name = name
+        self._recorded = 0
+
+    def attach(self, context: BrowserContext) -> None:
+        """Routes the network traffic of a new browser context through the
+        archive.
+
+        Args:
+            context (BrowserContext): The browser context.
+
+        Raises:
+            NetworkArchiveError: Raised in replay mode if the archive has
+                no HAR files.
+        """
+        if self.mode == "record":
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._recorded += 1
+            path = self.directory / f"{self.name}-{self._recorded:03d}.har"
+            context.route_from_har(
+                path, update=True, update_content="embed", update_mode="minimal"
+            )
+            log.info(f"Recording the network traffic of the context to {path}")
+            return
+        paths = sorted(self.directory.glob("*.har"))
+        if not paths:
+            raise NetworkArchiveError(
+                f"There is no network archive to replay in {self.directory}."
+            )
+        # Routes added later are tried first, so every archive falls back
+        # to the ones before it and the first aborts unknown requests.
+        for index, path in enumerate(paths):
+            context.route_from_har(
+                path, not_found="abort" if index == 0 else "fallback"
+            )
+        if self.latency > 0:
+            context.route("**/*", self._delay)
+        log.info(
+            f"Replaying the network traffic of the context from {len(paths)} "
+            f"archives in {self.directory}"
+        )
+
+    def _delay(self, route: Route, request: Request) -> None:
+        """Delays a request by the latency, then hands it to the archive.
+        Each route handler runs in its own fiber of the Playwright sync
+        API and the wait happens in the browser, so concurrent requests
+        are delayed concurrently."""
+        try:
+            request.frame.wait_for_timeout(self.latency)
+        except PlaywrightError:
+            # Requests without a live frame, such as those of a closing
+            # page, are served without delay.
+            pass
+        route.fallback()
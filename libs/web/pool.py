@@ -0,0 +1,156 @@
+"""This module shares one browser between several web automations in the
+same robot, such as Swag Labs and a second order entry portal, each in
+a browser context of its own leased from a `BrowserPool`.
+
+The browser is the robocorp.browser browser, or that of a browser
+server if one is configured (`libs.web.browser_server`), so a robot with
+several web sites launches a single browser process. The pool limits
+the number of contexts open at once, and contexts left unused for the
+idle timeout are evicted to free their memory: their cookies, storage
+and URL are kept, and the automation transparently leases a new context
+with them the next time it uses the browser. Idle contexts are evicted
+whenever a context of the pool is leased or used, and when an
+automation of the pool completes a work item.
+
+    with BrowserPool(max_contexts=2, idle_timeout=120) as pool:
+        swaglabs = Swaglabs(pool=pool)
+        portal = OrderPortal(pool=pool)
+        ...
+"""
+import time
+
+from typing import Any, Dict, Optional, Tuple
+from typing_extensions import Self
+
+from playwright.sync_api import Browser, BrowserContext
+
+from robocorp import browser, log
+
+from ..errors import ApplicationError
+from . import browser_server
+
+DEFAULT_MAX_CONTEXTS = 4
+DEFAULT_IDLE_TIMEOUT = 300.0
+"""Seconds a context may be left unused before it is evicted."""
+
+EvictedContext = Tuple[Dict[str, Any], Optional[str]]
+"""The storage state and URL of an evicted context."""
+
+
+class BrowserPoolExhaustedError(ApplicationError):
+    """Raised when a context is leased from a pool which already has the
+    maximum number of contexts open, none of them idle."""
+
+
+class BrowserPool:
+    """Leases browser contexts of one shared browser to web automations,
+    see the module documentation.
+
+    Args:
+        max_contexts (int): The maximum number of contexts open at once.
+        idle_timeout (float): Seconds a context may be left unused before
+            it is evicted, or None to never evict contexts.
+    """
+
+    def __init__(
+        self,
+        max_contexts: int = DEFAULT_MAX_CONTEXTS,
+        idle_timeout: Optional[float] = DEFAULT_IDLE_TIMEOUT,
+    ):
+        if max_contexts < 1:
+            raise ValueError(f"max_contexts must be at least 1, not {max_contexts}")
+        self.max_contexts = max_contexts
+        self.idle_timeout = idle_timeout
+        self._leases: Dict[BrowserContext, float] = {}
+        self._evicted: Dict[BrowserContext, EvictedContext] = {}
+
+    @property
+    def browser(self) -> Browser:
+        """The shared browser, launched or connected to on first use."""
+        return browser_server.connected_browser() or browser.browser()
+
+    @property
+    def size(self) -> int:
+        """The number of contexts currently leased."""
+        return len(self._leases)
+
+    def lease(self, **options: Any) -> BrowserContext:
+        """Opens a new context in the shared browser. The context is
+        returned to the pool by closing it. Idle contexts are evicted
+        first to make room for it.
+
+        Args:
+            options: The options of the new context, see the Playwright
+                `Browser.new_context` method.
+
+        Returns:
+            BrowserContext: The new context.
+
+        Raises:
+            BrowserPoolExhaustedError: Raised if the pool is full.
+        """
+        self.evict_idle()
+        if len(self._leases) >= self.max_contexts:
+            raise BrowserPoolExhaustedError(
+                f"The browser pool already has {self.max_contexts} contexts open."
+            )
+        context = self.browser.new_context(**options)
+        self._leases[context] = time.monotonic()
+        context.on("close", self._forget)
+        return context
+
+    def _forget(self, context: BrowserContext) -> None:
+        self._leases.pop(context, None)
+
+    def is_leased(self, context: BrowserContext) -> bool:
+        """Returns whether a context is open and leased from the pool."""
+        return context in self._leases
+
+    def touch(self, context: BrowserContext) -> None:
+        """Marks a leased context as used now, which delays its eviction,
+        and evicts the other contexts which have been idle too long."""
+        if context in self._leases:
+            self._leases[context] = time.monotonic()
+        self.evict_idle()
+
+    def evict_idle(self) -> None:
+        """Closes the contexts left unused for longer than the idle
+        timeout, keeping their storage state and URL for `restore`."""
+        if self.idle_timeout is None:
+            return
+        now = time.monotonic()
+        for context, used in list(self._leases.items()):
+            if now - used < self.idle_timeout:
+                continue
+            pages = [page for page in context.pages if not page.is_closed()]
+            url = pages[0].url if pages else None
+            self._evicted[context] = (context.storage_state(), url)
+            self._leases.pop(context)
+            log.info(f"Evicting a browser context idle for {now - used:.0f} s.")
+            context.close()
+
+    def restore(self, context: BrowserContext) -> Optional[EvictedContext]:
+        """Returns the storage state and URL of an evicted context, once.
+
+        Args:
+            context (BrowserContext): The evicted context.
+
+        Returns:
+            tuple: The storage state and the URL of its first page, or None
+                if the context was not evicted.
+        """
+        return self._evicted.pop(context, None)
+
+    def close(self) -> None:
+        """Closes every context leased from the pool. The shared browser
+        is left to robocorp.browser or the browser server."""
+        for context in list(self._leases):
+            context.close()
+        self._leases.clear()
+        self._evicted.clear()
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -9,23 +9,34 @@ they will be handled as expected.
 
 It also provides a context manager to ensure that the user is logged
 out when the automation is complete.
+
+The automation keeps a model of the cart contents, so `set_cart` only
+removes and adds the items which differ from the cart already on the
+site. The model belongs to the page it was read from and is forgotten
+when the page is replaced, for example when the browser is recycled, and
+on every login.
 """
 import random
 import string
 
-from typing import Mapping, Optional, Any
+from typing import Iterable, List, Mapping, Optional, Any
 from prodict import Prodict
 
 from playwright.sync_api import (
     Locator,
+    Page,
     TimeoutError,
 )
 
 from robocorp import log
 
-from . import WebAutomationBase, WebApplicationError, WebBusinessError
+from .. import perflog
+from . import WebAutomationBase, WebApplicationError, WebBusinessError, web_action
+from .pool import BrowserPool
 
 DEFAULT_URL = "https://www.saucedemo.com/"
+LOCATOR_PROFILES = ("fast", "robust")
+"""The locator profiles of `Swaglabs`, see `Swaglabs.configure_locators`."""
 
 
 ### APPLICATION ERRORS ###
@@ -73,7 +84,13 @@ class Swaglabs(WebAutomationBase):
         timeout: Optional[float] = None,
         browser_configuration: Optional[Mapping[str, Any]] = None,
         context_configuration: Optional[Mapping[str, Any]] = None,
+        pool: Optional[BrowserPool] = None,
     ):
+        self._locator_profile = "fast"
+        self._locators: Optional[Swaglabs.Locators] = None
+        self._locators_page: Optional[Page] = None
+        self._cart: Optional[List[str]] = None
+        self._cart_page: Optional[Page] = None
         super().__init__(
             username,
             password,
@@ -81,6 +98,7 @@ class Swaglabs(WebAutomationBase):
             timeout,
             browser_configuration,
             context_configuration,
+            pool,
         )
 
     def configure(
@@ -127,40 +145,153 @@ class Swaglabs(WebAutomationBase):
         order_finish_button: Locator
         order_confirmation: Locator
 
+    def configure_locators(self, profile: str) -> None:
+        """Selects the locator profile of the automation.
+
+        The "fast" profile, the default, uses CSS selectors on ids and
+        data-test attributes, which resolve with the CSS engine of the
+        browser. The "robust" profile uses role, placeholder and text
+        locators, which follow the accessibility tree and the visible
+        text, so they keep working when the markup changes but are
+        slower to resolve. Use it as a fallback if the web site changes
+        its ids or data-test attributes.
+
+        Args:
+            profile (str): Either "fast" or "robust".
+        """
+        if profile not in LOCATOR_PROFILES:
+            raise ValueError(
+                f"profile must be one of {', '.join(LOCATOR_PROFILES)}, not {profile}"
+            )
+        self._locator_profile = profile
+        self._locators = None
+
+    @property
+    def locator_profile(self) -> str:
+        """The locator profile in use, see `configure_locators`."""
+        return self._locator_profile
+
     @property
     def locators(self) -> Locators:
-        """The locators used by the automation."""
+        """The locators used by the automation. Locators are lazy, so
+        they are built once per page and profile and then reused."""
+        page = self.page
+        if self._locators is None or self._locators_page is not page:
+            if self._locator_profile == "robust":
+                self._locators = self._robust_locators(page)
+            else:
+                self._locators = self._fast_locators(page)
+            self._locators_page = page
+        return self._locators
+
+    def _fast_locators(self, page: Page) -> Locators:
+        """The locators of the "fast" profile."""
+        return self.Locators(
+            username=page.locator('[data-test="username"]'),
+            password=page.locator('[data-test="password"]'),
+            logon_button=page.locator('[data-test="login-button"]'),
+            menu_button=page.locator("#react-burger-menu-btn"),
+            close_menu_button=page.locator("#react-burger-cross-btn"),
+            logout_button=page.locator("#logout_sidebar_link"),
+            all_items_link=page.locator("#inventory_sidebar_link"),
+            cart_button=page.locator("#shopping_cart_container"),
+            # The cart list is on the checkout overview too, but only the
+            # cart page has a checkout button.
+            cart_page=page.locator(
+                '#cart_contents_container:has([data-test="checkout"])'
+            ),
+            cart_items=page.locator("div.cart_item"),
+            cart_items_container=page.locator("#cart_contents_container"),
+            cart_badge=page.locator(
+                "#shopping_cart_container span.shopping_cart_badge"
+            ),
+            inventory_container=page.locator(
+                "div#inventory_container.inventory_container"
+            ),
+            inventory_items=page.locator("div.inventory_item"),
+            checkout_button=page.locator('[data-test="checkout"]'),
+            customer_first_name=page.locator('[data-test="firstName"]'),
+            customer_last_name=page.locator('[data-test="lastName"]'),
+            customer_zip_code=page.locator('[data-test="postalCode"]'),
+            customer_continue_button=page.locator('[data-test="continue"]'),
+            order_finish_button=page.locator('[data-test="finish"]'),
+            order_confirmation=page.locator("#checkout_complete_container"),
+        )
 
+    def _robust_locators(self, page: Page) -> Locators:
+        """The locators of the "robust" profile."""
         return self.Locators(
-            username=self.page.get_by_placeholder("Username"),
-            password=self.page.get_by_placeholder("Password"),
-            logon_button=self.page.get_by_role("button", name="Login"),
-            menu_button=self.page.get_by_role("button", name="Open Menu"),
-            close_menu_button=self.page.get_by_role("button", name="Close Menu"),
-            logout_button=self.page.get_by_role("link", name="Logout"),
-            all_items_link=self.page.get_by_role("link", name="All Items"),
-            cart_button=self.page.locator("#shopping_cart_container"),
-            cart_page=self.page.get_by_text("Your Cart", exact=True),
-            cart_items=self.page.locator("div.cart_item"),
-            cart_items_container=self.page.locator("#cart_contents_container"),
-            cart_badge=self.page.locator("#shopping_cart_container").locator(
+            username=page.get_by_placeholder("Username"),
+            password=page.get_by_placeholder("Password"),
+            logon_button=page.get_by_role("button", name="Login"),
+            menu_button=page.get_by_role("button", name="Open Menu"),
+            close_menu_button=page.get_by_role("button", name="Close Menu"),
+            logout_button=page.get_by_role("link", name="Logout"),
+            all_items_link=page.get_by_role("link", name="All Items"),
+            cart_button=page.locator("#shopping_cart_container"),
+            cart_page=page.get_by_text("Your Cart", exact=True),
+            cart_items=page.locator("div.cart_item"),
+            cart_items_container=page.locator("#cart_contents_container"),
+            cart_badge=page.locator("#shopping_cart_container").locator(
                 "span.shopping_cart_badge"
             ),
-            inventory_container=self.page.locator(
+            inventory_container=page.locator(
                 "div#inventory_container.inventory_container"
             ),
-            inventory_items=self.page.locator("div.inventory_item"),
-            checkout_button=self.page.get_by_role("button", name="Checkout"),
-            customer_first_name=self.page.get_by_placeholder("First Name"),
-            customer_last_name=self.page.get_by_placeholder("Last Name"),
-            customer_zip_code=self.page.get_by_placeholder("Zip/Postal Code"),
-            customer_continue_button=self.page.get_by_role("button", name="Continue"),
-            order_finish_button=self.page.get_by_role("button", name="Finish"),
-            order_confirmation=self.page.get_by_text(
+            inventory_items=page.locator("div.inventory_item"),
+            checkout_button=page.get_by_role("button", name="Checkout"),
+            customer_first_name=page.get_by_placeholder("First Name"),
+            customer_last_name=page.get_by_placeholder("Last Name"),
+            customer_zip_code=page.get_by_placeholder("Zip/Postal Code"),
+            customer_continue_button=page.get_by_role("button", name="Continue"),
+            order_finish_button=page.get_by_role("button", name="Finish"),
+            order_confirmation=page.get_by_text(
                 "Your order has been dispatched, and will arrive just as fast as the pony can get there!"
             ),
         )
 
+    def _add_to_cart_button(self, item_name: str) -> Locator:
+        """The add to cart button of an item on the order screen."""
+        item = self.locators.inventory_items.filter(has_text=item_name)
+        if self._locator_profile == "robust":
+            return item.get_by_role("button", name="Add to cart")
+        return item.locator('button[data-test^="add-to-cart"]')
+
+    def _cart_item_link(self, item_name: str) -> Locator:
+        """The link of an item in the cart."""
+        if self._locator_profile == "robust":
+            return self.locators.cart_items_container.get_by_role(
+                "link", name=item_name
+            )
+        return self.locators.cart_items.locator(
+            "div.inventory_item_name", has_text=item_name
+        )
+
+    def _remove_button(self, cart_item: Locator) -> Locator:
+        """The remove button of an item in the cart."""
+        if self._locator_profile == "robust":
+            return cart_item.get_by_role("button", name="Remove")
+        return cart_item.locator('button[data-test^="remove"]')
+
+    def _known_cart(self) -> Optional[List[str]]:
+        """The modelled cart contents, or None if they are not known for
+        the current page."""
+        if self._cart_page is not self._page:
+            return None
+        return self._cart
+
+    def _remember_cart(self, items: Optional[List[str]]) -> None:
+        """Sets the modelled cart contents of the current page, or forgets
+        them if items is None."""
+        self._cart = items
+        self._cart_page = self._page if items is not None else None
+
+    def _cart_count(self) -> int:
+        """The number of items on the cart badge, without waiting."""
+        if not self.locators.cart_badge.is_visible():
+            return 0
+        return int(self.locators.cart_badge.inner_text())
+
     def is_logged_in(self) -> bool:
         """Determine if the user is logged in. Note that none of the calls
         in this method utilize automatic waiting.
@@ -176,6 +307,7 @@ class Swaglabs(WebAutomationBase):
             return True
         return False
 
+    @web_action
     def login(self, username: Optional[str] = None, password: Optional[str] = None):
         """Login to the Swag Labs web site. If the username and password
         are not provided, the username and password provided when the
@@ -190,6 +322,7 @@ class Swaglabs(WebAutomationBase):
             SwaglabsAuthenticationError: Raised if the authentication fails.
         """
         log.info("Logging in to the Swag Labs web site.")
+        self._remember_cart(None)
         if not self.is_logged_in():
             self.configure(username, password)
             if self.username is None or self.password is None:
@@ -210,6 +343,7 @@ class Swaglabs(WebAutomationBase):
             if not self.is_logged_in():
                 raise auth_error
 
+    @web_action
     def logout(self):
         """Logout of the Swag Labs web site.
 
@@ -224,6 +358,7 @@ class Swaglabs(WebAutomationBase):
         self.locators.menu_button.click()
         self.locators.logout_button.click()
 
+    @web_action
     def go_to_order_screen(self) -> None:
         """Go to the order screen.
 
@@ -231,7 +366,7 @@ class Swaglabs(WebAutomationBase):
             SwaglabsNotLoggedInError: Raised if the user is not logged in.
             SwaglabsWebError: Raised if the order screen cannot be reached.
         """
-        log.info("Going to the order screen.")
+        perflog.info("Going to the order screen.", sample="swaglabs.go_to_order_screen")
         if not self.is_logged_in():
             raise SwaglabsNotLoggedInError(
                 "Cannot go to the order screen on the Swag Labs web site when not logged in."
@@ -247,6 +382,7 @@ class Swaglabs(WebAutomationBase):
         if self.locators.close_menu_button.is_visible():
             self.locators.close_menu_button.click()
 
+    @web_action
     def add_item_to_cart(self, item_name: str) -> None:
         """Order the specified item.
 
@@ -257,7 +393,9 @@ class Swaglabs(WebAutomationBase):
             SwaglabsNotLoggedInError: Raised if the user is not logged in.
             SwaglabsItemNotFoundError: Raised if the item is not found.
         """
-        log.info(f"Ordering the {item_name} item.")
+        perflog.info(
+            "Ordering the %s item.", item_name, sample="swaglabs.add_item_to_cart"
+        )
         if not self.is_logged_in():
             raise SwaglabsNotLoggedInError(
                 "Cannot order items from the Swag Labs web site when not logged in."
@@ -265,14 +403,116 @@ class Swaglabs(WebAutomationBase):
         if not self.locators.inventory_container.is_visible():
             self.go_to_order_screen()
         try:
-            self.locators.inventory_items.filter(has_text=item_name).get_by_role(
-                "button", name="Add to cart"
-            ).click()
+            self._add_to_cart_button(item_name).click()
         except TimeoutError as e:
             raise SwaglabsItemNotFoundError(
                 f"The {item_name} item was not found on the Swag Labs web site."
             ) from e
+        cart = self._known_cart()
+        if cart is not None:
+            self._remember_cart(cart + [item_name])
+
+    @web_action
+    def remove_item_from_cart(self, item_name: str) -> None:
+        """Removes the specified item from the cart.
+
+        Args:
+            item_name (str): The name of the item to remove.
+
+        Raises:
+            SwaglabsNotLoggedInError: Raised if the user is not logged in.
+            SwaglabsItemNotFoundError: Raised if the item is not in the cart.
+        """
+        perflog.info(
+            "Removing the %s item.", item_name, sample="swaglabs.remove_item_from_cart"
+        )
+        if not self.is_logged_in():
+            raise SwaglabsNotLoggedInError(
+                "Cannot remove items from the cart on the Swag Labs web site when not logged in."
+            )
+        self.go_to_cart()
+        remove_button = self._remove_button(
+            self.locators.cart_items.filter(has_text=item_name)
+        )
+        try:
+            remove_button.click()
+            remove_button.wait_for(state="hidden", timeout=10000.0)
+        except TimeoutError as e:
+            self._remember_cart(None)
+            raise SwaglabsItemNotFoundError(
+                f"The {item_name} item was not found in the Swag Labs cart."
+            ) from e
+        cart = self._known_cart()
+        if cart is not None:
+            self._remember_cart([item for item in cart if item != item_name])
+
+    @web_action
+    def cart_contents(self) -> List[str]:
+        """Returns the names of the items in the cart. The cart is only
+        read from the site if the modelled contents are not known.
 
+        Returns:
+            list: The names of the items in the cart.
+
+        Raises:
+            SwaglabsNotLoggedInError: Raised if the user is not logged in.
+        """
+        if not self.is_logged_in():
+            raise SwaglabsNotLoggedInError(
+                "Cannot read the cart on the Swag Labs web site when not logged in."
+            )
+        cart = self._known_cart()
+        if cart is None:
+            if self.is_cart_empty():
+                cart = []
+            else:
+                self.go_to_cart()
+                cart = self.locators.cart_items.locator(
+                    "div.inventory_item_name"
+                ).all_inner_texts()
+            self._remember_cart(cart)
+        return list(cart)
+
+    @web_action
+    def set_cart(self, items: Iterable[str]) -> None:
+        """Makes the cart hold exactly the specified items, removing the
+        items in the cart which are not wanted and adding the missing
+        ones. Items already in the cart are left there, which saves a
+        removal and an addition for each of them compared to clearing
+        the cart. The number of items in the cart is checked afterwards.
+
+        Args:
+            items (iterable): The names of the items the cart should hold.
+
+        Raises:
+            SwaglabsNotLoggedInError: Raised if the user is not logged in.
+            SwaglabsItemNotFoundError: Raised if an item is not found.
+            SwaglabsWebAppError: Raised if the cart does not hold the
+                expected number of items afterwards.
+        """
+        wanted = list(dict.fromkeys(items))
+        current = self.cart_contents()
+        extra = [item for item in current if item not in wanted]
+        missing = [item for item in wanted if item not in current]
+        perflog.info(
+            "Updating the cart: %d items kept, %d removed, %d added.",
+            len(current) - len(extra),
+            len(extra),
+            len(missing),
+            sample="swaglabs.set_cart",
+        )
+        for item in extra:
+            self.remove_item_from_cart(item)
+        for item in missing:
+            self.add_item_to_cart(item)
+        count = self._cart_count()
+        if count != len(wanted):
+            self._remember_cart(None)
+            raise SwaglabsWebAppError(
+                f"The Swag Labs cart holds {count} items instead of {len(wanted)}."
+            )
+
+    @web_action
     def go_to_cart(self) -> None:
         """Go to the cart.
 
@@ -280,7 +520,7 @@ class Swaglabs(WebAutomationBase):
             SwaglabsNotLoggedInError: Raised if the user is not logged in.
             TimeoutError: Raised if the cart button is not visible.
         """
-        log.info("Going to the cart.")
+        perflog.info("Going to the cart.", sample="swaglabs.go_to_cart")
         if not self.is_logged_in():
             raise SwaglabsNotLoggedInError(
                 "Cannot go to the cart on the Swag Labs web site when not logged in."
@@ -295,6 +535,7 @@ class Swaglabs(WebAutomationBase):
                 "Failed to go to the cart on the Swag Labs web site."
             ) from e
 
+    @web_action
     def is_item_in_cart(self, item_name: str, *, return_to_last: bool = False) -> bool:
         """Determine if the specified item is in the cart.
 
@@ -312,36 +553,40 @@ class Swaglabs(WebAutomationBase):
                 the cart.
             TimeoutError: Raised if the cart button is not visible.
         """
-        log.info(f"Determining if the {item_name} item is in the cart.")
+        perflog.info(
+            "Determining if the %s item is in the cart.",
+            item_name,
+            sample="swaglabs.is_item_in_cart",
+        )
         if not self.is_logged_in():
             raise SwaglabsNotLoggedInError(
                 "Cannot determine if items are in the cart on the Swag Labs web site when not logged in."
             )
         self.go_to_cart()
         return_value = False
-        if self.locators.cart_items_container.get_by_role(
-            "link", name=item_name
-        ).is_visible():
+        if self._cart_item_link(item_name).is_visible():
             return_value = True
         if return_to_last:
             self.page.go_back()
         return return_value
 
+    @web_action
     def is_cart_empty(self) -> bool:
         """Checks if the cart is empty by looking at the badge count
         superimpsoed on the cart button. Note, this method skips
         actionability and visibility checks.
         """
-        log.info("Checking if the cart is empty.")
+        perflog.info("Checking if the cart is empty.", sample="swaglabs.is_cart_empty")
         if not self.is_logged_in():
             raise SwaglabsNotLoggedInError(
                 "Cannot determine if the cart is empty on the Swag Labs web site when not logged in."
             )
         return not self.locators.cart_badge.is_visible()
 
+    @web_action
     def clear_cart(self) -> None:
         """Empties the cart, essentially cancelling the order."""
-        log.info("Clearing the cart.")
+        perflog.info("Clearing the cart.", sample="swaglabs.clear_cart")
         if not self.is_logged_in():
             raise SwaglabsNotLoggedInError(
                 "Cannot clear the cart on the Swag Labs web site when not logged in."
@@ -349,12 +594,14 @@ class Swaglabs(WebAutomationBase):
         if not self.is_cart_empty():
             self.go_to_cart()
             for item in self.locators.cart_items.all():
-                item_remove_button = item.get_by_role("button", name="Remove")
+                item_remove_button = self._remove_button(item)
                 item_remove_button.click()
                 item_remove_button.wait_for(state="hidden", timeout=10000.0)
         else:
-            log.info("The cart is already empty.")
+            perflog.info("The cart is already empty.", sample="swaglabs.cart_empty")
+        self._remember_cart([])
 
+    @web_action
     def submit_order(self, first_name: str, last_name: str, zip_code: str) -> str:
         """Submits the current order from the cart. You must provide
         customer information for the order.
@@ -372,7 +619,7 @@ class Swaglabs(WebAutomationBase):
             SwaglabsCartEmptyError: Raised if the cart is empty.
             SwaglabsOrderError: Raised if the order fails.
         """
-        log.info("Submitting the order.")
+        perflog.info("Submitting the order.", sample="swaglabs.submit_order")
         if not self.is_logged_in():
             raise SwaglabsNotLoggedInError(
                 "Cannot submit the order on the Swag Labs web site when not logged in."
@@ -391,9 +638,12 @@ class Swaglabs(WebAutomationBase):
         try:
             self.locators.order_confirmation.wait_for()
         except TimeoutError as e:
+            self._remember_cart(None)
             raise SwaglabsOrderError(
                 "Failed to submit the order on the Swag Labs web site."
             ) from e
+        # The web site empties the cart when an order is submitted.
+        self._remember_cart([])
         order_number = self.get_order_number()
         if order_number is None:
             raise SwaglabsOrderError(
@@ -401,12 +651,13 @@ class Swaglabs(WebAutomationBase):
             )
         return order_number
 
+    @web_action
     def get_order_number(self) -> Optional[str]:
         """Gets the order number from the confirmation page. Note, this
         method skips actionability and visibility checks and returns
         None if the page is not a confirmation page.
         """
-        log.info("Getting the order number.")
+        perflog.info("Getting the order number.", sample="swaglabs.get_order_number")
         if not self.is_logged_in():
             raise SwaglabsNotLoggedInError(
                 "Cannot get the order number on the Swag Labs web site when not logged in."
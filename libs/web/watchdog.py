@@ -0,0 +1,139 @@
+"""This module provides a watchdog for hung browser actions.
+
+Playwright calls normally give up after their timeout, but some calls,
+such as a navigation that never settles, can stall well past it. Since
+the consumer processes work items one after another in a single thread,
+one stalled call would block the robot for good.
+
+The watchdog runs a background thread that tracks how long the current
+action has been running. When the action passes its hard deadline, the
+thread asks the Playwright event loop to cancel the calls in flight. The
+blocked call then raises `asyncio.CancelledError` in the automation
+thread, while the connection to the browser stays usable so the page or
+context can be rebuilt.
+
+Note: the watchdog never calls Playwright objects from its own thread,
+it only schedules the cancellation on the Playwright event loop, which
+is the one thread-safe entry point of that loop.
+"""
+import asyncio
+import threading
+import time
+
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+
+def playwright_loop(api_object: Any) -> Optional[asyncio.AbstractEventLoop]:
+    """Returns the event loop which runs the calls of an object of the
+    Playwright sync API, such as a page, or None if it cannot be found.
+
+    Playwright has no public API for its event loop, so this is the one
+    place which reads the private `_loop` attribute of its sync objects,
+    checked against the pinned Playwright version of robocorp-browser.
+    If a later version drops the attribute, actions run without the
+    watchdog rather than failing.
+
+    Args:
+        api_object (Any): An object of the Playwright sync API.
+    """
+    loop = getattr(api_object, "_loop", None)
+    return loop if isinstance(loop, asyncio.AbstractEventLoop) else None
+
+
+def _cancel_playwright_calls(loop: asyncio.AbstractEventLoop) -> None:
+    """Cancels the Playwright API calls in flight on the loop. Tasks
+    created by the synchronous Playwright API are tagged with their
+    calling stack, the connection's own tasks are left untouched.
+    """
+    for pending in asyncio.all_tasks(loop):
+        if hasattr(pending, "__pw_stack__") and not pending.done():
+            pending.cancel()
+
+
+class ActionWatchdog:
+    """Tracks the running time of browser actions and cancels the
+    Playwright calls of an action which passes the hard deadline.
+    Only one action is tracked at a time.
+    """
+
+    def __init__(self, deadline: float):
+        """Initializes the watchdog. The background thread is started
+        when the first action is watched.
+
+        Args:
+            deadline (float): The hard deadline of an action in seconds.
+        """
+        if deadline <= 0:
+            raise ValueError("deadline must be a positive number of seconds")
+        self.deadline = deadline
+        self.fired = False
+        self._condition = threading.Condition()
+        self._action: Optional[str] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._started = 0.0
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def action(self) -> Optional[str]:
+        """The name of the action being watched, if any."""
+        return self._action
+
+    @property
+    def elapsed(self) -> float:
+        """How long the current action has been running in seconds,
+        or 0.0 if no action is being watched.
+        """
+        if self._action is None:
+            return 0.0
+        return time.monotonic() - self._started
+
+    @contextmanager
+    def watch(self, action: str, loop: asyncio.AbstractEventLoop) -> Iterator[None]:
+        """Watches an action for the duration of the context.
+
+        Args:
+            action (str): The name of the action, used for reporting.
+            loop (asyncio.AbstractEventLoop): The Playwright event loop
+                the action's calls run on.
+        """
+        with self._condition:
+            self._action = action
+            self._loop = loop
+            self._started = time.monotonic()
+            self.fired = False
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="web-action-watchdog", daemon=True
+                )
+                self._thread.start()
+            self._condition.notify()
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._action = None
+                self._loop = None
+                self._condition.notify()
+
+    def _run(self) -> None:
+        with self._condition:
+            while True:
+                if self._action is None or self._loop is None:
+                    self._condition.wait()
+                    continue
+                remaining = self._started + self.deadline - time.monotonic()
+                if remaining > 0:
+                    self._condition.wait(remaining)
+                    continue
+                self.fired = True
+                try:
+                    self._loop.call_soon_threadsafe(
+                        _cancel_playwright_calls, self._loop
+                    )
+                except RuntimeError:
+                    # The loop was closed, there is nothing left to cancel.
+                    pass
+                # Only fire once per action.
+                self._action = None
+                self._loop = None
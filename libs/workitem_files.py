@@ -0,0 +1,149 @@
+"""This module opens files attached to input work items for reading
+without first copying them to the robot directory.
+
+`Input.get_file` loads the whole file into memory and writes it to a
+local path, which must then be read again by the caller. For large
+order exports that is an extra full write and read. Instead,
+`open_file` returns a binary file object, chosen by the work item
+adapter:
+
+ * With the local file adapter, the attached file is opened in place.
+ * With the Control Room adapter, the file is streamed from its download
+   URL, so a sequential reader (such as a CSV reader) parses rows as they
+   arrive. Readers which need random access (such as an Excel workbook,
+   which is a zip archive) ask for a seekable file, which is downloaded
+   to a temporary file instead.
+ * With any other adapter, the file is downloaded to a temporary file
+   with `Input.get_file`.
+
+Finding the local path of a file and its download URL relies on the
+internals of robocorp.workitems, which this module was written against
+version 1.4.0 of (the version bundled with robocorp 1.0.0, see
+conda.yaml). If those internals change, `local_path` returns None and
+files are downloaded with the public `Input.get_file`, so a newer version
+of the library only loses the optimization.
+
+Requests for the download URL and the start of the download go through
+the HTTP client of robocorp.workitems, so they are retried like its own
+downloads. Once rows are being parsed, a streamed download cannot be
+retried, and a connection lost midway fails the reader with the
+exception raised by requests.
+"""
+from contextlib import contextmanager
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Any, BinaryIO, Iterator, Optional
+
+from robocorp.workitems import Input
+
+
+def _adapter(work_item: Input, adapter_name: str) -> Optional[Any]:
+    """Returns the adapter of a work item if it is an instance of the
+    named robocorp.workitems adapter class, or None otherwise or if the
+    adapter classes cannot be found."""
+    try:
+        from robocorp.workitems import _adapters
+
+        adapter_class = getattr(_adapters, adapter_name)
+    except (ImportError, AttributeError):
+        return None
+    adapter = getattr(work_item, "_adapter", None)
+    return adapter if isinstance(adapter, adapter_class) else None
+
+
+def local_path(work_item: Input, name: str) -> Optional[Path]:
+    """Returns the local path of a file attached to a work item, if the
+    work item adapter keeps its files on the local file system.
+
+    Args:
+        work_item (Input): The input work item.
+        name (str): The name of the attached file.
+
+    Returns:
+        Path | None: The path of the file, or None if it is not local or
+            the adapter is not one this module knows.
+    """
+    adapter = _adapter(work_item, "FileAdapter")
+    if adapter is None:
+        return None
+    try:
+        source, item = adapter._get_item(work_item.id)
+        path = Path(item.get("files", {})[name])
+        if not path.is_absolute():
+            parent = adapter.input_path if source == "input" else adapter.output_path
+            path = parent.parent / path
+    except (AttributeError, KeyError, TypeError):
+        return None
+    return path
+
+
+def _start_download(work_item: Input, name: str) -> Optional[Any]:
+    """Starts streaming a file of the Control Room adapter and returns
+    the response, or None if the adapter is not the Control Room one."""
+    adapter = _adapter(work_item, "RobocorpAdapter")
+    if adapter is None:
+        return None
+    try:
+        file_id = adapter.file_id(work_item.id, name)
+        client = adapter._workitem_requests
+    except AttributeError:
+        return None
+    response = client.get(f"{work_item.id}/files/{file_id}")
+    return client.get(
+        response.json()["url"],
+        _handle_error=lambda download: download.raise_for_status(),
+        _sensitive=True,
+        headers={},
+        stream=True,
+    )
+
+
+@contextmanager
+def downloaded_file(work_item: Input, name: str) -> Iterator[Path]:
+    """Returns the local path of a file attached to a work item, which
+    is downloaded with `Input.get_file` to a temporary directory, deleted
+    on exit, if the file is not local.
+
+    Args:
+        work_item (Input): The input work item.
+        name (str): The name of the attached file.
+
+    Raises:
+        FileNotFoundError: Raised if the work item has no such file.
+    """
+    if name not in work_item.files:
+        raise FileNotFoundError(f"No file with name: {name}")
+    path = local_path(work_item, name)
+    if path is not None:
+        yield path
+        return
+    with TemporaryDirectory(prefix="workitem-files-") as directory:
+        yield work_item.get_file(name, Path(directory) / Path(name).name)
+
+
+@contextmanager
+def open_file(
+    work_item: Input, name: str, seekable: bool = False
+) -> Iterator[BinaryIO]:
+    """Opens a file attached to a work item for reading, see the module
+    documentation.
+
+    Args:
+        work_item (Input): The input work item.
+        name (str): The name of the attached file.
+        seekable (bool): Whether the reader needs random access to the file.
+
+    Raises:
+        FileNotFoundError: Raised if the work item has no such file.
+    """
+    if name not in work_item.files:
+        raise FileNotFoundError(f"No file with name: {name}")
+    download = None if seekable else _start_download(work_item, name)
+    if download is not None:
+        with download:
+            download.raw.decode_content = True
+            yield download.raw
+        return
+    with downloaded_file(work_item, name) as path:
+        with path.open("rb") as file:
+            yield file
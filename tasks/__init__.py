@@ -5,6 +5,8 @@ from pathlib import Path
 
 from robocorp import vault, storage, log
 
+from libs import metrics, perflog
+
 ARTIFACTS_DIR = os.getenv("ROBOT_ARTIFACTS", "output")
 ROBOT_ROOT = Path(__file__).parent.parent
 DEVDATA = ROBOT_ROOT / "devdata"
@@ -14,6 +16,12 @@ def setup_log() -> None:
     """Tries to use the LOG_LEVEL text asset or environment variable
     to set the log level. If the value is not valid, the default is
     "info". The environment variable will override the asset value.
+
+    The LOG_MODE text asset or environment variable selects the logging
+    mode of `libs.perflog`, either "full" (the default) or "performance".
+    The performance mode samples repetitive per-item messages, emitting
+    only every LOG_SAMPLE_EVERY-th one (100 by default), and shortens
+    the representation of logged values.
     """
     try:
         log_level = storage.get_text("LOG_LEVEL")
@@ -24,7 +32,37 @@ def setup_log() -> None:
         log_level = log.FilterLogLevel(log_level)
     except ValueError:
         log_level = log.FilterLogLevel.INFO
-    log.setup_log(output_log_level=log_level)
+    try:
+        log_mode = storage.get_text("LOG_MODE")
+    except (storage.AssetNotFound, RuntimeError, KeyError):
+        log_mode = perflog.FULL
+    log_mode = os.getenv("LOG_MODE", log_mode).lower()
+    if log_mode not in perflog.MODES:
+        log_mode = perflog.FULL
+    try:
+        sample_every = max(int(os.getenv("LOG_SAMPLE_EVERY", "100")), 1)
+    except ValueError:
+        sample_every = 100
+    perflog.configure(log_mode, sample_every)
+    if perflog.is_performance_mode():
+        log.setup_log(output_log_level=log_level, max_value_repr_size=100)
+    else:
+        log.setup_log(output_log_level=log_level)
+
+
+def start_metrics(task_name: str) -> metrics.Exporter:
+    """Starts exporting the robot metrics of a task in the Prometheus
+    text format. The file is written every METRICS_INTERVAL seconds (15
+    by default) and when the task exits. It is written to the path in
+    METRICS_PATH, or to metrics-<task>.prom in the artifacts directory.
+    Point the textfile collector of a node exporter at the file to
+    scrape it.
+    """
+    path = os.getenv(
+        "METRICS_PATH", str(Path(ARTIFACTS_DIR) / f"metrics-{task_name}.prom")
+    )
+    interval = float(os.getenv("METRICS_INTERVAL", "15"))
+    return metrics.start_export(path, task_name, interval)
 
 
 def get_secret(system: str) -> vault.SecretContainer:
@@ -63,4 +101,11 @@ def get_secret(system: str) -> vault.SecretContainer:
     return vault.get_secret(secret_name)
 
 
-__all__ = ["ARTIFACTS_DIR", "ROBOT_ROOT", "DEVDATA", "setup_log", "get_secret"]
+__all__ = [
+    "ARTIFACTS_DIR",
+    "ROBOT_ROOT",
+    "DEVDATA",
+    "setup_log",
+    "start_metrics",
+    "get_secret",
+]
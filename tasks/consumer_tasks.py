@@ -2,18 +2,87 @@
 entry point. This utilizes the robocorp.tasks framework as 
 well as the robocorp.log facility to log additional information.
 """
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
 from robocorp import log, workitems
 from robocorp.tasks import task
 
-from . import setup_log, get_secret
+from . import ARTIFACTS_DIR, setup_log, start_metrics, get_secret
+from .profiling import profiled
 
+from libs import metrics, perflog
+from libs.deadline import RunDeadline
+from libs.prefetch import PrefetchingInputs
+from libs.ledger import (
+    COMPLETED,
+    STARTED,
+    SUBMITTED,
+    SUBMITTING,
+    OrderLedger,
+    ledger_key,
+)
+from libs.orders import Order
+from libs.web import browser_server, har
 from libs.web.swaglabs import Swaglabs
 
 
-INPUT_FILE_NAME = "orders.csv"
+LEDGER_PATH = Path(
+    os.getenv("ORDER_LEDGER_PATH", Path(ARTIFACTS_DIR) / "order_ledger.sqlite3")
+)
+"""Path to the order ledger. Set ORDER_LEDGER_PATH to a persistent
+location to protect against duplicate orders across robot runs."""
+RECYCLE_AFTER_ITEMS = os.getenv("BROWSER_RECYCLE_AFTER_ITEMS")
+"""Recycle the browser page after this many work items."""
+RECYCLE_RSS_WATERMARK_MB = os.getenv("BROWSER_RECYCLE_RSS_MB")
+"""Recycle the browser page when memory use passes this many MB."""
+RECYCLE_SCOPE = os.getenv("BROWSER_RECYCLE_SCOPE", "page")
+"""Either "page" or "context", the browser object to recycle."""
+ACTION_DEADLINE = os.getenv("BROWSER_ACTION_DEADLINE", "120")
+"""Hard deadline in seconds of a single browser action, after which the
+browser context is rebuilt and the work item fails. Set to an empty
+string to disable the watchdog."""
+TRACE_ON_FAILURE = os.getenv("BROWSER_TRACE_ON_FAILURE", "")
+"""Save a Playwright trace of failed work items to the artifacts directory.
+Set to "on", optionally adding "screenshots" and "snapshots" separated
+by commas, for example "on,screenshots"."""
+PREFETCH = os.getenv("WORKITEM_PREFETCH", "1") != "0"
+"""Whether to reserve the next input work item in the background while
+the browser is recycled and the metrics are updated. Set to 0 to
+disable prefetching."""
+RUN_BUDGET = os.getenv("RUN_DEADLINE_SECONDS")
+"""The time in seconds the consumer may run, which should be somewhat
+less than the step timeout in the Control Room. No new work items are
+taken once the time left is shorter than the next order is predicted
+to take."""
+BROWSER_SERVER_URL = os.getenv("BROWSER_SERVER_URL")
+"""The CDP endpoint of a persistent browser server to use instead of
+launching a browser, such as http://127.0.0.1:9222. A browser is
+launched as usual if the server is not running."""
+LOCATOR_PROFILE = os.getenv("SWAGLABS_LOCATOR_PROFILE", "fast")
+"""The locator profile of the Swag Labs automation, "fast" (CSS and
+data-test selectors) or "robust" (role and text locators)."""
+NETWORK_MODE = os.getenv("BROWSER_NETWORK_MODE", "live")
+"""Either "live", "record" to record the network traffic of the browser
+to NETWORK_ARCHIVE, replacing any earlier recording, or "replay" to
+answer every request from it."""
+NETWORK_ARCHIVE = os.getenv(
+    "BROWSER_NETWORK_ARCHIVE", str(Path(ARTIFACTS_DIR) / "network")
+)
+"""The directory of the network recording."""
+NETWORK_LATENCY = float(os.getenv("BROWSER_REPLAY_LATENCY_MS", "0"))
+"""Milliseconds to delay each replayed request."""
+ORDER_DURATION_ESTIMATE = float(os.getenv("ORDER_DURATION_ESTIMATE", "60"))
+"""The predicted duration of an order in seconds before any was timed."""
 
 
-def process_order(swaglabs: Swaglabs, work_item: workitems.Input) -> None:
+def process_order(
+    swaglabs: Swaglabs,
+    work_item: workitems.Input,
+    ledger: Optional[OrderLedger] = None,
+) -> None:
     """Processes an order (a single work item).
 
     Args:
@@ -24,43 +93,156 @@ def process_order(swaglabs: Swaglabs, work_item: workitems.Input) -> None:
         work_item (workitems.Input): The order to process. Providing this
             from a context manager ensures that the work item is marked
             as completed when the context manager exits.
+        ledger (OrderLedger): An optional ledger of order progress. If the
+            ledger shows the order was already submitted by an earlier
+            attempt, the order is not placed again and the recorded
+            order number is used for the output. If it shows the output
+            was already created, no output is created again.
     """
-    log.info(f"Processing work item {work_item.id}")
-    # Return to the main page with an empty cart.
-    swaglabs.clear_cart()
-    swaglabs.go_to_order_screen()
+    perflog.info(
+        "Processing work item %s", work_item.id, sample="consumer.process_order"
+    )
     payload = work_item.payload
-    assert isinstance(payload, dict)
-    set_items = set(payload.get("Items", []))
-    log.info(f"Ordering {len(set_items)} items for {payload.get('Name')}")
-    for item in set_items:
-        swaglabs.add_item_to_cart(item)
-    log.info(f"Submitting order for work item {work_item.id}")
-    first_name = payload.get("Name", "").split(" ")[0]
-    last_name = payload.get("Name", "").split(" ")[1]
-    order_number = swaglabs.submit_order(first_name, last_name, payload.get("Zip", ""))
-    log.info(f"Order submitted for work item {work_item.id}")
+    # The payload is validated before anything is done with it. The
+    # order drops duplicate items while keeping the order stable, so a
+    # retried work item produces exactly the same output payload.
+    order = Order.from_payload(payload, require_zip=True)
+
+    key = ledger_key(work_item.id, payload)
+    entry = ledger.get(key) if ledger is not None else None
+    if entry is not None and entry.stage == COMPLETED:
+        # The output was already saved by an earlier attempt, so another
+        # one would make the reporter count the order twice.
+        log.info(
+            f"Order for work item {work_item.id} was already completed "
+            f"as {entry.order_number}, releasing it without a new output."
+        )
+        return
+    if entry is not None and entry.is_submitted:
+        log.info(
+            f"Order for work item {work_item.id} was already submitted "
+            f"as {entry.order_number}, skipping."
+        )
+        order_number = entry.order_number
+    else:
+        if entry is not None and entry.stage == SUBMITTING:
+            log.warn(
+                f"A previous attempt stopped while submitting the order for "
+                f"work item {work_item.id}, the order will be submitted again."
+            )
+        if ledger is not None:
+            ledger.record(key, work_item.id, STARTED)
+        perflog.info(
+            "Ordering %d items for %s",
+            len(order.items),
+            order.name,
+            sample="consumer.ordering",
+        )
+        # Only the difference to the current cart is added and removed,
+        # for example when a failed attempt left items in the cart.
+        swaglabs.set_cart(order.items)
+        perflog.info(
+            "Submitting order for work item %s",
+            work_item.id,
+            sample="consumer.submitting",
+        )
+        if ledger is not None:
+            ledger.record(key, work_item.id, SUBMITTING)
+        order_number = swaglabs.submit_order(
+            order.first_name, order.last_name, order.zip_code
+        )
+        if ledger is not None:
+            ledger.record(key, work_item.id, SUBMITTED, order_number)
+        perflog.info(
+            "Order submitted for work item %s",
+            work_item.id,
+            sample="consumer.submitted",
+        )
 
     # Create work items for reporter step.
     output = work_item.create_output()
-    output.payload = {
-        "Name": payload.get("Name"),
-        "Items": list(set_items),
-        "OrderNumber": order_number,
-    }
+    output.payload = Order(
+        order.name, order.items, order_number=order_number
+    ).to_payload()
     output.save()
+    if ledger is not None:
+        ledger.record(key, work_item.id, COMPLETED, order_number)
+    perflog.summary(
+        "order_processed",
+        work_item=work_item.id,
+        items=len(order.items),
+        order_number=order_number,
+        reused=entry is not None and entry.is_submitted,
+    )
 
 
 @task
+@profiled
 def consumer():
     setup_log()
+    start_metrics("consumer")
     log.info("Consumer task started.")
+    deadline = RunDeadline(
+        float(RUN_BUDGET) if RUN_BUDGET else None,
+        initial_estimate=ORDER_DURATION_ESTIMATE,
+    )
     credentials = get_secret("swaglabs")
-    with Swaglabs(
+    if BROWSER_SERVER_URL:
+        browser_server.configure(BROWSER_SERVER_URL)
+    log.info(f"Using the order ledger at {LEDGER_PATH}")
+    # The automation is configured before it logs in, when entering the
+    # with statement, so the login already uses the network mode.
+    swaglabs = Swaglabs(
         credentials["username"], credentials["password"], credentials["url"]
-    ) as swaglabs:
-        # This loop is the most important in the Consumer.
-        for work_item in workitems.inputs:
-            with work_item:
-                process_order(swaglabs, work_item)
-            log.info(f"Work item was released with state '{work_item.state}'.")
+    )
+    swaglabs.configure_locators(LOCATOR_PROFILE)
+    if NETWORK_MODE == "record":
+        har.clear_archive(NETWORK_ARCHIVE)
+    swaglabs.configure_network(NETWORK_MODE, NETWORK_ARCHIVE, NETWORK_LATENCY)
+    swaglabs.configure_recycling(
+        int(RECYCLE_AFTER_ITEMS) if RECYCLE_AFTER_ITEMS else None,
+        float(RECYCLE_RSS_WATERMARK_MB) if RECYCLE_RSS_WATERMARK_MB else None,
+        RECYCLE_SCOPE,
+    )
+    swaglabs.configure_watchdog(float(ACTION_DEADLINE) if ACTION_DEADLINE else None)
+    trace_options = {o.strip().lower() for o in TRACE_ON_FAILURE.split(",")}
+    swaglabs.configure_tracing(
+        ARTIFACTS_DIR if TRACE_ON_FAILURE else None,
+        screenshots="screenshots" in trace_options,
+        snapshots="snapshots" in trace_options,
+    )
+    with OrderLedger(LEDGER_PATH) as ledger, swaglabs:
+        # This loop is the most important in the Consumer. No work items
+        # are taken that cannot be finished before the deadline, they are
+        # left for the next robot instead. Leaving the loop before it
+        # comes back around means no further work item is reserved. The
+        # next work item is reserved in the background once there is time
+        # for it, while the browser is recycled.
+        out_of_time = False
+        with PrefetchingInputs(workitems.inputs) as inputs:
+            for work_item in inputs:
+                started = time.perf_counter()
+                with work_item:
+                    with metrics.track_work_item():
+                        with swaglabs.trace_work_item(work_item.id):
+                            process_order(swaglabs, work_item, ledger)
+                duration = time.perf_counter() - started
+                deadline.record(duration)
+                out_of_time = not deadline.allows()
+                if PREFETCH and not out_of_time:
+                    inputs.prefetch_next()
+                perflog.summary(
+                    "work_item_released",
+                    work_item=work_item.id,
+                    state=work_item.state,
+                    seconds=round(duration, 3),
+                )
+                swaglabs.work_item_completed()
+                if out_of_time:
+                    break
+        if out_of_time:
+            log.info(
+                f"Stopped taking work items with {deadline.remaining:.0f} seconds "
+                f"left, the next order was predicted to take "
+                f"{deadline.predicted_duration:.0f} seconds."
+            )
@@ -2,45 +2,99 @@
 entry point. This utilizes the robocorp.tasks framework as 
 well as the robocorp.log facility to log additional information.
 """
+import os
+
+from contextlib import ExitStack
 from pathlib import Path
+from typing import Iterator, List, Tuple
 
-from robocorp import log, workitems, excel
+from robocorp import log, workitems
 from robocorp.tasks import task
-from robocorp.excel import tables
 
-from . import ARTIFACTS_DIR, setup_log
+from libs import metrics, perflog
+from libs.order_files import (
+    ORDER_FILE_SUFFIXES,
+    OrderFileError,
+    group_by_customer,
+    iter_order_rows,
+    needs_seekable,
+    read_order_files,
+)
+from libs.orders import InvalidOrderError, Order
+from libs.workitem_files import downloaded_file, open_file
+
+from . import setup_log, start_metrics
+from .profiling import profiled
+
 
+ORDER_FILE_WORKERS = int(os.getenv("ORDER_FILE_WORKERS", "0")) or None
+"""The number of processes reading order files when the input work item
+has more than one, by default the number of CPUs."""
 
-INPUT_FILE_NAME = "orders.csv"
+
+def _order_file_sources(
+    work_item: workitems.Input, names: List[str], stack: ExitStack
+) -> Iterator[Tuple[str, Path]]:
+    """Yields the local path of each order file, downloading the files
+    which are not local until the stack is closed, for reading in
+    another process."""
+    for name in names:
+        yield name, stack.enter_context(downloaded_file(work_item, name))
 
 
 @task
+@profiled
 def producer():
     setup_log()
+    start_metrics("producer")
     log.info("Producer task started.")
 
     # Often times, a producer bot needs to go get work items from
     # some report, but in this example, we utilize the work item
-    # file to create child work items.
+    # files to create child work items.
     work_item = workitems.inputs.current
-    destination_path = Path(ARTIFACTS_DIR) / INPUT_FILE_NAME
-    input_filepath = work_item.get_file(INPUT_FILE_NAME, destination_path)
-    log.info(f"Reading orders from {input_filepath}")
-    # this call will likely be modified soon with updates to robocorp-excel.
-    table = tables.Tables().read_table_from_csv(
-        str(input_filepath), encoding="utf-8-sig"
+    order_file_names = sorted(
+        name
+        for name in work_item.files
+        if Path(name).suffix.lower() in ORDER_FILE_SUFFIXES
+    )
+    if not order_file_names:
+        raise OrderFileError(
+            "The input work item has no order files of the types "
+            f"{', '.join(ORDER_FILE_SUFFIXES)}."
+        )
+    log.info(f"Reading orders from {', '.join(order_file_names)}")
+    if len(order_file_names) == 1:
+        # Rows are streamed from the attached file without copying it to
+        # the artifacts directory first, and only the customers are kept
+        # in memory, which keeps large CSV and Excel files cheap to read.
+        name = order_file_names[0]
+        with open_file(work_item, name, seekable=needs_seekable(name)) as file:
+            customers = group_by_customer(iter_order_rows(file, name))
+    else:
+        # Files are parsed in parallel and merged in name order, so the
+        # work items are created in the same order on every run.
+        # The workers read the files from disk, so only their paths are
+        # sent to them.
+        with ExitStack() as downloads:
+            customers = read_order_files(
+                _order_file_sources(work_item, order_file_names, downloads),
+                max_workers=ORDER_FILE_WORKERS,
+            )
+    row_count = sum(len(customer["Items"]) for customer in customers.values())
+    log.info(
+        f"Found {row_count} rows for {len(customers)} customers. Creating work items."
     )
-    customers = table.group_by_column("Name")
-    log.info(f"Found {len(table)} rows in the worksheet. Creating work items.")
-    for customer in customers:
-        assert isinstance(customer, excel.Table)
-        log.info(f"Creating work items for {customer.get_column('Name')[0]}")
-        work_item_vars = {
-            "Name": customer.get_column("Name")[0],
-            "Zip": customer.get_column("Zip")[0],
-            "Items": [],
-        }
-        for row in customer:
-            work_item_vars["Items"].append(row["Item"])
-        workitems.outputs.create(work_item_vars, save=True)
+    for customer in customers.values():
+        # Orders are validated here, so a customer with bad data is
+        # reported once instead of failing a consumer work item later.
+        try:
+            order = Order(customer["Name"], customer["Items"], customer["Zip"])
+        except InvalidOrderError as e:
+            perflog.warn("Skipping the order of %r: %s", customer["Name"], e)
+            metrics.count_work_items("rejected")
+            continue
+        perflog.info("Creating work items for %s", order.name, sample="producer.create")
+        workitems.outputs.create(order.to_payload(), save=True)
+        metrics.count_work_items("created")
     log.info("Producer task completed.")
@@ -0,0 +1,165 @@
+"""This module provides an opt-in profiling hook for tasks.
+
+Decorate a task with `profiled` (below the `@task` decorator) and set the
+PROFILE environment variable to profile a run without changing code:
+
+ * PROFILE=cpu samples the call stack of the task every PROFILE_INTERVAL
+   milliseconds (5 by default). The samples are written to the artifacts
+   directory as folded stacks, which most flame graph tools can read,
+   along with a summary of the PROFILE_TOP functions (30 by default)
+   that were seen most often.
+ * PROFILE=alloc traces memory allocations with tracemalloc. The final
+   snapshot is written to the artifacts directory along with a summary
+   of the PROFILE_TOP source lines holding the most memory.
+
+When PROFILE is not set, `profiled` returns the task unchanged, so the
+hook costs nothing.
+"""
+import functools
+import os
+import sys
+import threading
+import tracemalloc
+
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, List, TypeVar
+
+from robocorp import log
+
+from . import ARTIFACTS_DIR
+
+PROFILE = os.getenv("PROFILE", "").lower()
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "30"))
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "5")) / 1000
+
+_Task = TypeVar("_Task", bound=Callable[..., Any])
+
+
+class _StackSampler:
+    """Samples the call stack of one thread from a background thread."""
+
+    def __init__(self, thread_id: int, interval: float):
+        self._thread_id = thread_id
+        self._interval = interval
+        self._stopping = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="profile-sampler", daemon=True
+        )
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def _run(self) -> None:
+        while not self._stopping.wait(self._interval):
+            frame = sys._current_frames().get(self._thread_id)
+            stack: List[str] = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopping.set()
+        self._thread.join()
+
+
+def _write_cpu_profile(name: str, sampler: _StackSampler) -> None:
+    directory = Path(ARTIFACTS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    folded_path = directory / f"profile-{name}-cpu.folded"
+    with folded_path.open("w", encoding="utf-8") as file:
+        for stack, count in sampler.stacks.most_common():
+            file.write(f"{stack} {count}\n")
+    inclusive: Counter = Counter()
+    exclusive: Counter = Counter()
+    for stack, count in sampler.stacks.items():
+        frames = stack.split(";")
+        exclusive[frames[-1]] += count
+        for frame in set(frames):
+            inclusive[frame] += count
+    total = max(sampler.samples, 1)
+    lines = [
+        f"CPU profile of {name}: {sampler.samples} samples "
+        f"every {PROFILE_INTERVAL * 1000:g} ms",
+        "",
+        "Top functions by own samples:",
+    ]
+    for frame, count in exclusive.most_common(PROFILE_TOP):
+        lines.append(f"  {count / total:7.1%}  {frame}")
+    lines += ["", "Top functions by inclusive samples:"]
+    for frame, count in inclusive.most_common(PROFILE_TOP):
+        lines.append(f"  {count / total:7.1%}  {frame}")
+    summary_path = directory / f"profile-{name}-cpu.txt"
+    summary_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    log.info(f"Wrote the CPU profile of {name} to {folded_path} and {summary_path}")
+
+
+def _write_alloc_profile(name: str, snapshot: tracemalloc.Snapshot, peak: int) -> None:
+    directory = Path(ARTIFACTS_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    snapshot_path = directory / f"profile-{name}-alloc.tracemalloc"
+    snapshot.dump(str(snapshot_path))
+    statistics = snapshot.statistics("lineno")
+    total = sum(statistic.size for statistic in statistics)
+    lines = [
+        f"Allocation profile of {name}: {total / 1024:.1f} KiB held at the end, "
+        f"{peak / 1024:.1f} KiB at the peak",
+        "",
+        "Top source lines by memory held:",
+    ]
+    for statistic in statistics[:PROFILE_TOP]:
+        frame = statistic.traceback[0]
+        lines.append(
+            f"  {statistic.size / 1024:10.1f} KiB {statistic.count:8d} blocks  "
+            f"{frame.filename}:{frame.lineno}"
+        )
+    summary_path = directory / f"profile-{name}-alloc.txt"
+    summary_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    log.info(
+        f"Wrote the allocation profile of {name} to {snapshot_path} and {summary_path}"
+    )
+
+
+def profiled(func: _Task) -> _Task:
+    """Profiles the task according to the PROFILE environment variable,
+    see the module documentation. Returns the task unchanged when
+    profiling is off.
+    """
+    if PROFILE == "cpu":
+
+        @functools.wraps(func)
+        def cpu_wrapper(*args, **kwargs):
+            sampler = _StackSampler(threading.get_ident(), PROFILE_INTERVAL)
+            sampler.start()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                sampler.stop()
+                _write_cpu_profile(func.__name__, sampler)
+
+        return cpu_wrapper  # type: ignore
+
+    if PROFILE == "alloc":
+
+        @functools.wraps(func)
+        def alloc_wrapper(*args, **kwargs):
+            tracemalloc.start(25)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                snapshot = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                _write_alloc_profile(func.__name__, snapshot, peak)
+
+        return alloc_wrapper  # type: ignore
+
+    return func
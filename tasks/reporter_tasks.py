@@ -6,10 +6,15 @@ from datetime import datetime
 from robocorp import log, workitems
 from robocorp.tasks import task
 
-from . import ARTIFACTS_DIR, DEVDATA, setup_log
+from libs import metrics
+from libs.orders import Order
+
+from . import ARTIFACTS_DIR, DEVDATA, setup_log, start_metrics
+from .profiling import profiled
 
 
 @task
+@profiled
 def reporter():
     """
     Reporters should generally be the last step in a Control Room
@@ -28,6 +33,7 @@ def reporter():
     an email or other notification.
     """
     setup_log()
+    start_metrics("reporter")
     log.info("Reporter task started.")
 
     # The final output work item should be created first, because
@@ -37,21 +43,18 @@ def reporter():
     results = []
     for work_item in workitems.inputs:
         with work_item:
-            # This is a simple example of how you can pull out
-            # information from the set of completed work items
-            log.info(f"Processing work item ID {work_item.id}")
-            payload = work_item.payload
-            assert isinstance(payload, dict)
-            name = payload.get("Name", "")
-            items = payload.get("Items", [])
-            order_number = payload.get("OrderNumber", "")
-            results.append(
-                {
-                    "name": name,
-                    "order_length": len(items),
-                    "order_number": order_number,
-                }
-            )
+            with metrics.track_work_item():
+                # This is a simple example of how you can pull out
+                # information from the set of completed work items
+                log.info(f"Processing work item ID {work_item.id}")
+                order = Order.from_payload(work_item.payload)
+                results.append(
+                    {
+                        "name": order.name,
+                        "order_length": len(order.items),
+                        "order_number": order.order_number or "",
+                    }
+                )
 
     timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
     output.payload = {"run_timestamp": timestamp, "results": results}
@@ -7,16 +7,56 @@ is the same as the test file with a .env extension. For example, if
 the test file is named test_foo.py, then the .env file should be named
 test_foo.env. The .env file is loaded automatically by the
 module_env_vars fixture.
+
+The web tests get their Swag Labs automations from a pool of pre-warmed
+automations, see `SwaglabsPool`. Each test gets its own browser context,
+so tests share no cookies, storage or cart and can run in parallel
+across pytest-xdist workers, for example with `pytest -n auto`. The pool
+is configured with the variables of the web test .env file:
+ * BASE_URL: The base URL of the Swag Labs website.
+ * SECRET_NAME: The name of the secret in the CR vault which contains the
+    website credentials.
+ * LOCATOR_PROFILE: The locator profile to test, "fast" (the default) or
+    "robust".
+ * NETWORK_MODE: "live" (the default) to test against the web site,
+    "record" to also record its network traffic to NETWORK_ARCHIVE,
+    replacing any earlier recording, or "replay" to run the tests
+    offline from that recording.
+ * NETWORK_ARCHIVE: The directory of the recording, by default the
+    network directory of the web tests.
+ * NETWORK_LATENCY: Milliseconds to delay each replayed request.
+ * SWAGLABS_POOL_SIZE: The number of logged in automations each worker
+    keeps ready, 2 by default.
 """
+import os
 import pytest
 
 # Integration with robocorp-log provided by robocorp-log-pytest
-from robocorp import log
+from robocorp import log, vault
 from pathlib import Path
+from typing import Any, Dict, Generator, List, Optional, Union
+from urllib.parse import urljoin
 from dotenv import load_dotenv
 
+from libs.web import har
+from libs.web.swaglabs import Swaglabs
+
 ENV_PATH = Path(__file__).parent / ".env"
 """Path to the root .env file."""
+DEFAULT_NETWORK_ARCHIVE = Path(__file__).parent / "web_tests" / "network"
+"""Path to the default network recording of the web tests."""
+WORKER = os.environ.get("PYTEST_XDIST_WORKER", "main")
+"""The name of the pytest-xdist worker running the tests, if any."""
+
+
+def pytest_sessionstart(session: pytest.Session) -> None:
+    """Removes the previous network recording before recording anew. With
+    pytest-xdist this only runs in the controller, before any worker
+    starts recording."""
+    if hasattr(session.config, "workerinput"):
+        return
+    if os.environ.get("NETWORK_MODE") == "record":
+        har.clear_archive(os.environ.get("NETWORK_ARCHIVE", DEFAULT_NETWORK_ARCHIVE))
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -48,3 +88,146 @@ def module_env_vars(request: pytest.FixtureRequest) -> None:
     log.info(f"Loading environment variables from {env_path.name}")
     if env_path.exists():
         load_dotenv(env_path)
+
+
+@pytest.fixture(scope="module")
+def credentials() -> Union[vault.SecretContainer, dict]:
+    """A vault with Swag Labs credentials.
+
+    Vault Secrets will only work if test are ran via rcc. If
+    vault secrets are not found, secrets will be loaded from
+    environment variables "USERNAME" and "PASSWORD". If those
+    are not found, a dictionary with blank strings will
+    be returned and live tests will fail.
+    """
+    try:
+        return vault.get_secret(os.environ.get("SECRET_NAME", "swaglabs"))
+    except (KeyError, vault.RobocorpVaultError):
+        pass
+    try:
+        return {
+            "username": os.environ["AUTOMATION_USERNAME"],
+            "password": os.environ["AUTOMATION_PASSWORD"],
+        }
+    except KeyError:
+        return {
+            "username": "",
+            "password": "",
+        }
+
+
+class SwaglabsPool:
+    """A pool of Swag Labs automations which are logged in and waiting on
+    the inventory page. Only the first automation logs in, the others
+    start their own browser context from its cookies and storage. All
+    automations of a worker share its browser.
+
+    Args:
+        credentials (mapping): The Swag Labs credentials.
+        size (int): The number of automations to keep ready.
+    """
+
+    def __init__(self, credentials: Any, size: int):
+        self.credentials = credentials
+        self.size = max(size, 1)
+        self._ready: List[Swaglabs] = []
+        self._storage_state: Optional[Dict[str, Any]] = None
+        self._created = 0
+
+    def new_automation(
+        self, storage_state: Optional[Dict[str, Any]] = None
+    ) -> Swaglabs:
+        """Creates an automation in a browser context of its own.
+
+        Args:
+            storage_state (dict): Cookies and storage to start the context
+                with.
+
+        Returns:
+            Swaglabs: The automation, on a blank page.
+        """
+        self._created += 1
+        swag = Swaglabs()
+        swag.configure(
+            base_url=os.environ.get("BASE_URL", "https://www.saucedemo.com"),
+            browser_configuration={"headless": True},
+        )
+        swag.configure_locators(os.environ.get("LOCATOR_PROFILE", "fast"))
+        swag.configure_network(
+            os.environ.get("NETWORK_MODE", "live"),
+            os.environ.get("NETWORK_ARCHIVE", DEFAULT_NETWORK_ARCHIVE),
+            float(os.environ.get("NETWORK_LATENCY", "0")),
+            name=f"{WORKER}-{self._created:03d}",
+        )
+        swag.use_isolated_context(storage_state)
+        return swag
+
+    def _warm(self) -> Swaglabs:
+        swag = self.new_automation(self._storage_state)
+        if self._storage_state is not None:
+            swag.page.goto(urljoin(swag.base_url, "inventory.html"))
+        if not swag.is_logged_in():
+            swag.login(
+                username=self.credentials["username"],
+                password=self.credentials["password"],
+            )
+            self._storage_state = swag.context.storage_state()
+        return swag
+
+    def fill(self) -> None:
+        """Warms up automations until the pool is full."""
+        while len(self._ready) < self.size:
+            self._ready.append(self._warm())
+
+    def acquire(self) -> Swaglabs:
+        """Takes a logged in automation out of the pool.
+
+        Returns:
+            Swaglabs: The automation, on the inventory page.
+        """
+        if not self._ready:
+            self.fill()
+        return self._ready.pop(0)
+
+    def release(self, swag: Swaglabs) -> None:
+        """Closes an automation taken from the pool, which also writes any
+        network recording, and warms up its replacement.
+
+        Args:
+            swag (Swaglabs): The automation.
+        """
+        swag.context.close()
+        self.fill()
+
+    def close(self) -> None:
+        """Closes the automations left in the pool."""
+        while self._ready:
+            self._ready.pop().context.close()
+
+
+@pytest.fixture(scope="module")
+def swaglabs_pool(
+    module_env_vars: None, credentials: Any
+) -> Generator[SwaglabsPool, None, None]:
+    """The pool of logged in Swag Labs automations of the worker."""
+    pool = SwaglabsPool(credentials, int(os.environ.get("SWAGLABS_POOL_SIZE", "2")))
+    yield pool
+    pool.close()
+
+
+@pytest.fixture
+def swag(swaglabs_pool: SwaglabsPool) -> Generator[Swaglabs, None, None]:
+    """A Swag Labs automation in a browser context of its own, which is
+    not logged in."""
+    swag = swaglabs_pool.new_automation()
+    yield swag
+    swag.context.close()
+
+
+@pytest.fixture
+def swag_logged_in(swaglabs_pool: SwaglabsPool) -> Generator[Swaglabs, None, None]:
+    """A Swag Labs automation from the pool, logged in with an empty cart
+    in a browser context of its own."""
+    swag = swaglabs_pool.acquire()
+    yield swag
+    swaglabs_pool.release(swag)
@@ -0,0 +1,51 @@
+"""Unit tests for the run deadline."""
+import math
+
+# System under test
+from libs.deadline import RunDeadline
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_no_deadline_always_allows() -> None:
+    """Tests that a run without a budget never stops taking work"""
+    deadline = RunDeadline(None)
+    assert deadline.remaining == math.inf
+    assert deadline.allows()
+
+
+def test_initial_estimate_is_used() -> None:
+    """Tests the prediction before any work item was timed"""
+    deadline = RunDeadline(100, initial_estimate=50, safety_factor=1.0)
+    assert deadline.predicted_duration == 50
+    assert deadline.allows()
+    assert not RunDeadline(40, initial_estimate=50, safety_factor=1.0).allows()
+
+
+def test_prediction_follows_recent_durations() -> None:
+    """Tests that the prediction is the 90th percentile of recent durations"""
+    deadline = RunDeadline(100, history=10, safety_factor=1.0)
+    for duration in [1, 2, 3, 4, 5, 6, 7, 8, 9, 30]:
+        deadline.record(duration)
+    assert deadline.predicted_duration == 9
+    deadline.record(10)
+    assert deadline.predicted_duration == 10
+
+
+def test_stops_when_time_runs_out() -> None:
+    """Tests that work stops once the time left is too short"""
+    clock = FakeClock()
+    deadline = RunDeadline(60, safety_factor=1.0, clock=clock)
+    deadline.record(20)
+    assert deadline.allows()
+    clock.now = 45
+    assert deadline.remaining == 15
+    assert not deadline.allows()
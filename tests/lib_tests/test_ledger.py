@@ -0,0 +1,66 @@
+"""Unit tests for the order ledger."""
+from pathlib import Path
+
+import pytest
+
+# System under test
+from libs.ledger import (
+    COMPLETED,
+    STARTED,
+    SUBMITTED,
+    SUBMITTING,
+    OrderLedger,
+    ledger_key,
+)
+
+
+@pytest.fixture
+def ledger(tmp_path: Path) -> OrderLedger:
+    """An empty ledger in a temporary directory."""
+    with OrderLedger(tmp_path / "ledger.sqlite3") as ledger:
+        yield ledger
+
+
+def test_ledger_key_is_stable() -> None:
+    """Tests that key order in the payload does not change the key"""
+    first = ledger_key("item-1", {"Name": "A B", "Items": ["x"]})
+    second = ledger_key("item-1", {"Items": ["x"], "Name": "A B"})
+    assert first == second
+
+
+def test_ledger_key_changes_with_payload() -> None:
+    """Tests that a corrected payload is treated as a new order"""
+    first = ledger_key("item-1", {"Name": "A B", "Items": ["x"]})
+    second = ledger_key("item-1", {"Name": "A B", "Items": ["y"]})
+    assert first != second
+
+
+def test_unknown_order(ledger: OrderLedger) -> None:
+    """Tests that an unknown key has no entry"""
+    assert ledger.get("missing") is None
+
+
+def test_order_progress(ledger: OrderLedger) -> None:
+    """Tests that an order is only reported as submitted once it has
+    an order number"""
+    key = ledger_key("item-1", {})
+    ledger.record(key, "item-1", STARTED)
+    ledger.record(key, "item-1", SUBMITTING)
+    entry = ledger.get(key)
+    assert entry is not None and not entry.is_submitted
+    ledger.record(key, "item-1", SUBMITTED, "ON-123-4567890")
+    ledger.record(key, "item-1", COMPLETED)
+    entry = ledger.get(key)
+    assert entry is not None
+    assert entry.is_submitted
+    assert entry.order_number == "ON-123-4567890"
+
+
+def test_ledger_survives_reopening(tmp_path: Path) -> None:
+    """Tests that records are persisted to disk"""
+    path = tmp_path / "ledger.sqlite3"
+    with OrderLedger(path) as ledger:
+        ledger.record("key", "item-1", SUBMITTED, "ON-123-4567890")
+    with OrderLedger(path) as ledger:
+        entry = ledger.get("key")
+    assert entry is not None and entry.order_number == "ON-123-4567890"
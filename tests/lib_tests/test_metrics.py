@@ -0,0 +1,89 @@
+"""Unit tests for the robot metrics."""
+from pathlib import Path
+
+import pytest
+
+# System under test
+from libs import metrics
+from libs.errors import ApplicationError, BusinessError
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch: pytest.MonkeyPatch) -> metrics.Registry:
+    """A fresh registry for each test."""
+    registry = metrics.Registry()
+    registry.task = "consumer"
+    monkeypatch.setattr(metrics, "REGISTRY", registry)
+    return registry
+
+
+class SwaglabsItemError(BusinessError):
+    """A stand-in for a business error raised by an automation."""
+
+
+def test_work_items_counted_by_outcome(registry: metrics.Registry) -> None:
+    """Tests that successes and failures are counted by error class"""
+    with metrics.track_work_item():
+        pass
+    with pytest.raises(SwaglabsItemError):
+        with metrics.track_work_item():
+            raise SwaglabsItemError("not found")
+    with pytest.raises(ApplicationError):
+        with metrics.track_work_item():
+            raise ApplicationError("timeout")
+    with pytest.raises(KeyError):
+        with metrics.track_work_item():
+            raise KeyError("Name")
+    assert registry.work_items.get(task="consumer", state="done") == 1
+    assert registry.work_items.get(task="consumer", state="failed") == 3
+    assert (
+        registry.failures.get(
+            task="consumer", kind="business", error="SwaglabsItemError"
+        )
+        == 1
+    )
+    assert (
+        registry.failures.get(
+            task="consumer", kind="application", error="ApplicationError"
+        )
+        == 1
+    )
+    assert registry.failures.get(task="consumer", kind="unexpected", error="KeyError")
+    assert registry.work_item_duration.count(task="consumer") == 4
+
+
+def test_text_exposition(registry: metrics.Registry) -> None:
+    """Tests the text format of counters and histograms"""
+    metrics.count_work_items("created", 2)
+    metrics.observe_action("login", 0.3)
+    text = registry.expose()
+    assert "# TYPE robot_work_items_total counter" in text
+    assert 'robot_work_items_total{state="created",task="consumer"} 2' in text
+    assert (
+        'robot_action_duration_seconds_bucket{action="login",task="consumer",le="0.25"} 0'
+        in text
+    )
+    assert (
+        'robot_action_duration_seconds_bucket{action="login",task="consumer",le="0.5"} 1'
+        in text
+    )
+    assert (
+        'robot_action_duration_seconds_bucket{action="login",task="consumer",le="+Inf"} 1'
+        in text
+    )
+    assert (
+        'robot_action_duration_seconds_sum{action="login",task="consumer"} 0.3' in text
+    )
+    assert "# EOF" not in text
+
+
+def test_exporter_writes_file(tmp_path: Path) -> None:
+    """Tests that the exporter writes the metrics when stopped"""
+    path = tmp_path / "metrics.prom"
+    exporter = metrics.Exporter(path, interval=60)
+    exporter.start()
+    metrics.count_work_items("created")
+    exporter.stop()
+    assert (
+        'robot_work_items_total{state="created",task="consumer"} 1' in path.read_text()
+    )
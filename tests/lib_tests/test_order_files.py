@@ -0,0 +1,105 @@
+"""Unit tests for reading and grouping order files."""
+from pathlib import Path
+
+import pytest
+from openpyxl import Workbook
+
+# System under test
+from libs.order_files import (
+    OrderFileError,
+    group_by_customer,
+    iter_order_rows,
+    merge_customers,
+    read_order_files,
+)
+
+ROWS = [
+    ("Sol Heaton", "Sauce Labs Bolt T-Shirt", "3695"),
+    ("Gregg Arroyo", "Sauce Labs Onesie", "4418"),
+    ("Sol Heaton", "Sauce Labs Fleece Jacket", "3695"),
+]
+
+
+@pytest.fixture
+def csv_path(tmp_path: Path) -> Path:
+    """An orders.csv file with a byte order mark, like the sample data."""
+    path = tmp_path / "orders.csv"
+    lines = ["Name,Item,Zip"] + [",".join(row) for row in ROWS]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8-sig")
+    return path
+
+
+@pytest.fixture
+def xlsx_path(tmp_path: Path) -> Path:
+    """An orders.xlsx file with numeric zip codes and an extra column."""
+    path = tmp_path / "orders.xlsx"
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(["Zip", "Name", "Item", "Comment"])
+    for name, item, zip_code in ROWS:
+        sheet.append([int(zip_code), name, item, None])
+    sheet.append([None, None, None, None])
+    workbook.save(path)
+    return path
+
+
+@pytest.mark.parametrize("fixture_name", ["csv_path", "xlsx_path"])
+def test_grouping(request: pytest.FixtureRequest, fixture_name: str) -> None:
+    """Tests that CSV and Excel files group into the same payloads"""
+    path = request.getfixturevalue(fixture_name)
+    customers = group_by_customer(iter_order_rows(path))
+    assert list(customers.values()) == [
+        {
+            "Name": "Sol Heaton",
+            "Zip": "3695",
+            "Items": ["Sauce Labs Bolt T-Shirt", "Sauce Labs Fleece Jacket"],
+        },
+        {"Name": "Gregg Arroyo", "Zip": "4418", "Items": ["Sauce Labs Onesie"]},
+    ]
+
+
+def test_missing_column(tmp_path: Path) -> None:
+    """Tests that a file without the required columns is rejected"""
+    path = tmp_path / "orders.csv"
+    path.write_text("Name,Zip\nSol Heaton,3695\n")
+    with pytest.raises(OrderFileError):
+        list(iter_order_rows(path))
+
+
+def test_unsupported_file_type(tmp_path: Path) -> None:
+    """Tests that unknown file types are rejected"""
+    with pytest.raises(OrderFileError):
+        iter_order_rows(tmp_path / "orders.json")
+
+
+def test_merge_customers() -> None:
+    """Tests that a customer in several files is merged in file order"""
+    east = {"Sol Heaton": {"Name": "Sol Heaton", "Zip": "3695", "Items": ["A"]}}
+    west = {
+        "Gregg Arroyo": {"Name": "Gregg Arroyo", "Zip": "4418", "Items": ["B"]},
+        "Sol Heaton": {"Name": "Sol Heaton", "Zip": "9999", "Items": ["C"]},
+    }
+    customers = merge_customers([east, west])
+    assert list(customers) == ["Sol Heaton", "Gregg Arroyo"]
+    assert customers["Sol Heaton"] == {
+        "Name": "Sol Heaton",
+        "Zip": "3695",
+        "Items": ["A", "C"],
+    }
+
+
+def test_read_order_files(csv_path: Path, xlsx_path: Path) -> None:
+    """Tests that files read in parallel give the same result as in order"""
+    sources = [("orders.csv", csv_path), ("orders.xlsx", xlsx_path)]
+    expected = merge_customers(
+        group_by_customer(iter_order_rows(path)) for path in (csv_path, xlsx_path)
+    )
+    assert read_order_files(sources, max_workers=2) == expected
+    assert (
+        expected["Sol Heaton"]["Items"]
+        == [
+            "Sauce Labs Bolt T-Shirt",
+            "Sauce Labs Fleece Jacket",
+        ]
+        * 2
+    )
@@ -0,0 +1,57 @@
+"""Unit tests for the order model."""
+import pytest
+
+# System under test
+from libs.orders import InvalidOrderError, Order, split_name
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("Sol Heaton", ("Sol", "Heaton")),
+        ("  Sol   Heaton ", ("Sol", "Heaton")),
+        ("Sol Heaton\tArroyo", ("Sol", "Heaton Arroyo")),
+        ("Cher", ("Cher", "Cher")),
+    ],
+)
+def test_split_name(name: str, expected: tuple) -> None:
+    """Tests that names are split into first and last names"""
+    assert split_name(name) == expected
+
+
+def test_from_payload() -> None:
+    """Tests that a producer payload is read and normalized"""
+    order = Order.from_payload(
+        {"Name": "Sol Heaton", "Zip": 3695, "Items": ["A", "B", "A"]},
+        require_zip=True,
+    )
+    assert (order.first_name, order.last_name) == ("Sol", "Heaton")
+    assert order.to_payload() == {
+        "Name": "Sol Heaton",
+        "Items": ["A", "B"],
+        "Zip": "3695",
+    }
+
+
+def test_payload_round_trip() -> None:
+    """Tests that an order survives its own payload"""
+    order = Order("Sol Heaton", ["A"], order_number="ON-1")
+    assert Order.from_payload(order.to_payload()) == order
+    assert "Zip" not in order.to_payload()
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        None,
+        {"Name": "Sol Heaton", "Items": ["A"]},
+        {"Name": " ", "Zip": "3695", "Items": ["A"]},
+        {"Name": "Sol Heaton", "Zip": "3695", "Items": []},
+        {"Name": "Sol Heaton", "Zip": "3695", "Items": "A"},
+        {"Name": "Sol Heaton", "Zip": "3695", "Items": ["A", None]},
+    ],
+)
+def test_invalid_payload(payload: object) -> None:
+    """Tests that invalid payloads are rejected as business errors"""
+    with pytest.raises(InvalidOrderError):
+        Order.from_payload(payload, require_zip=True)
@@ -0,0 +1,54 @@
+"""Unit tests for the performance logging layer."""
+from typing import Generator, List
+
+import pytest
+
+# System under test
+from libs import perflog
+
+
+@pytest.fixture
+def messages(monkeypatch: pytest.MonkeyPatch) -> Generator[List[str], None, None]:
+    """Captures the messages passed on to robocorp.log."""
+    captured: List[str] = []
+    monkeypatch.setattr(perflog.log, "info", captured.append)
+    monkeypatch.setattr(perflog.log, "warn", captured.append)
+    yield captured
+    perflog.configure(perflog.FULL)
+
+
+def test_full_mode_logs_everything(messages: List[str]) -> None:
+    """Tests that sampling is disabled in full mode"""
+    perflog.configure(perflog.FULL)
+    for item in range(3):
+        perflog.info("Ordering the %s item.", item, sample="add")
+    assert messages == [f"Ordering the {item} item." for item in range(3)]
+
+
+def test_performance_mode_samples(messages: List[str]) -> None:
+    """Tests that only every Nth sampled message is emitted"""
+    perflog.configure(perflog.PERFORMANCE, sample_every=2)
+    for item in range(5):
+        perflog.info("Ordering the %s item.", item, sample="add")
+    assert messages == [
+        "Ordering the 0 item.",
+        "Ordering the 2 item.",
+        "Ordering the 4 item.",
+    ]
+
+
+def test_performance_mode_keeps_warnings(messages: List[str]) -> None:
+    """Tests that warnings and summaries are never sampled"""
+    perflog.configure(perflog.PERFORMANCE, sample_every=100)
+    perflog.warn("Something went %s", "wrong")
+    perflog.summary("order_processed", work_item="1", items=2)
+    assert messages == [
+        "Something went wrong",
+        'order_processed {"work_item":"1","items":2}',
+    ]
+
+
+def test_invalid_mode() -> None:
+    """Tests that an unknown mode is rejected"""
+    with pytest.raises(ValueError):
+        perflog.configure("verbose")
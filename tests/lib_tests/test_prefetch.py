@@ -0,0 +1,80 @@
+"""Unit tests for the prefetching input work item iterator. These tests
+use the local file adapter of robocorp.workitems, which like the Control
+Room only allows one input work item to be reserved at a time."""
+import json
+
+from pathlib import Path
+from typing import List
+
+import pytest
+from robocorp import workitems
+from robocorp.workitems import Inputs, State
+from robocorp.workitems._adapters import FileAdapter
+from robocorp.workitems._context import Context
+
+# System under test
+from libs.prefetch import UNPROCESSED_CODE, PrefetchingInputs
+
+
+@pytest.fixture
+def context(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Context:
+    """A work item context of the file adapter with four input work items,
+    the first of which is reserved as at the start of a task."""
+    input_path = tmp_path / "work-items.json"
+    input_path.write_text(json.dumps([{"payload": {"id": i}} for i in range(4)]))
+    monkeypatch.setenv("RC_WORKITEM_INPUT_PATH", str(input_path))
+    monkeypatch.setenv("RC_WORKITEM_OUTPUT_PATH", str(tmp_path / "out.json"))
+    context = Context(FileAdapter())
+    context.reserve_input()
+    monkeypatch.setattr(workitems, "_ctx", lambda: context)
+    return context
+
+
+def test_all_items_processed_in_order(context: Context) -> None:
+    """Tests that every work item is yielded once, in order, starting
+    with the one reserved before the task"""
+    seen: List[int] = []
+    with PrefetchingInputs(Inputs()) as inputs:
+        for work_item in inputs:
+            with work_item:
+                seen.append(work_item.payload["id"])
+            inputs.prefetch_next()
+    assert seen == [0, 1, 2, 3]
+    assert [item.state for item in context.inputs] == [State.DONE] * 4
+
+
+def test_unreleased_items_are_done(context: Context) -> None:
+    """Tests that the iterator works without prefetching and marks
+    unreleased work items as done"""
+    with PrefetchingInputs(Inputs()) as inputs:
+        seen = [work_item.payload["id"] for work_item in inputs]
+    assert seen == [0, 1, 2, 3]
+    assert all(item.state == State.DONE for item in context.inputs)
+
+
+def test_prefetch_requires_release(context: Context) -> None:
+    """Tests that the next work item is not reserved while the current
+    one is still reserved"""
+    with PrefetchingInputs(Inputs()) as inputs:
+        for work_item in inputs:
+            with pytest.raises(RuntimeError):
+                inputs.prefetch_next()
+            work_item.done()
+            break
+    assert len(context.inputs) == 1
+
+
+def test_unprocessed_item_is_released(
+    context: Context, caplog: pytest.LogCaptureFixture
+) -> None:
+    """Tests that a work item prefetched but not processed is released"""
+    with PrefetchingInputs(Inputs()) as inputs:
+        for work_item in inputs:
+            work_item.done()
+            inputs.prefetch_next()
+            break
+    first, second = context.inputs
+    assert first.state == State.DONE
+    assert second.state == State.FAILED
+    # The file adapter only logs the exception it releases a work item with.
+    assert f"'code': '{UNPROCESSED_CODE}'" in caplog.text
@@ -0,0 +1,123 @@
+"""Unit tests for opening files attached to work items."""
+import io
+import json
+
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import pytest
+from robocorp.workitems import Input
+from robocorp.workitems import _adapters
+from robocorp.workitems._adapters import FileAdapter
+
+# System under test
+from libs.order_files import group_by_customer, iter_order_rows
+from libs.workitem_files import downloaded_file, local_path, open_file
+
+
+@pytest.fixture
+def work_item(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Input:
+    """An input work item of the local file adapter with orders.csv."""
+    (tmp_path / "orders.csv").write_text(
+        "Name,Item,Zip\nSol Heaton,Sauce Labs Onesie,3695\n", encoding="utf-8-sig"
+    )
+    input_path = tmp_path / "work-items.json"
+    input_path.write_text(
+        json.dumps([{"payload": {}, "files": {"orders.csv": "orders.csv"}}])
+    )
+    monkeypatch.setenv("RC_WORKITEM_INPUT_PATH", str(input_path))
+    monkeypatch.setenv("RC_WORKITEM_OUTPUT_PATH", str(tmp_path / "out.json"))
+    item = Input(FileAdapter(), "0")
+    item.load()
+    return item
+
+
+def test_local_path(work_item: Input, tmp_path: Path) -> None:
+    """Tests that files of the file adapter are resolved in place"""
+    assert local_path(work_item, "orders.csv") == tmp_path / "orders.csv"
+
+
+def test_open_file_is_parsed_in_place(work_item: Input, tmp_path: Path) -> None:
+    """Tests that an attached file is parsed without copying it"""
+    with open_file(work_item, "orders.csv") as file:
+        customers = group_by_customer(iter_order_rows(file, "orders.csv"))
+        assert not file.closed
+    assert list(customers) == ["Sol Heaton"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == [
+        "orders.csv",
+        "work-items.json",
+    ]
+
+
+def test_open_missing_file(work_item: Input) -> None:
+    """Tests that a file which is not attached is reported"""
+    with pytest.raises(FileNotFoundError):
+        with open_file(work_item, "orders.xlsx"):
+            pass
+
+
+def test_downloaded_file_is_local(work_item: Input, tmp_path: Path) -> None:
+    """Tests that a local file is not downloaded again"""
+    with downloaded_file(work_item, "orders.csv") as path:
+        assert path == tmp_path / "orders.csv"
+    assert path.exists()
+
+
+def test_unknown_adapter_falls_back(
+    work_item: Input, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Tests that the file is downloaded with the public API if the
+    adapter classes of robocorp.workitems cannot be found"""
+    monkeypatch.delattr(_adapters, "FileAdapter")
+    assert local_path(work_item, "orders.csv") is None
+    with downloaded_file(work_item, "orders.csv") as path:
+        assert path.parent != tmp_path
+        assert path.read_bytes() == (tmp_path / "orders.csv").read_bytes()
+    assert not path.exists()
+    with open_file(work_item, "orders.csv", seekable=True) as file:
+        customers = group_by_customer(iter_order_rows(file, "orders.csv"))
+    assert list(customers) == ["Sol Heaton"]
+
+
+class FakeResponse:
+    """A streamed response of the work item HTTP client."""
+
+    def __init__(self, content: bytes) -> None:
+        self.raw = io.BytesIO(content)
+
+    def json(self) -> Dict[str, str]:
+        return {"url": "https://files.example.com/orders.csv"}
+
+    def __enter__(self) -> "FakeResponse":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.raw.close()
+
+
+class FakeRequests:
+    """The HTTP client of the Control Room adapter, which records the
+    requests made with it."""
+
+    def __init__(self) -> None:
+        self.requests: List[Tuple[str, Dict[str, Any]]] = []
+
+    def get(self, url: str, **kwargs: Any) -> FakeResponse:
+        self.requests.append((url, kwargs))
+        return FakeResponse(b"Name,Item,Zip\nSol Heaton,Sauce Labs Onesie,3695\n")
+
+
+def test_control_room_file_is_streamed() -> None:
+    """Tests that a Control Room file is streamed with the retrying HTTP
+    client of robocorp.workitems"""
+    adapter = _adapters.RobocorpAdapter.__new__(_adapters.RobocorpAdapter)
+    adapter._workitem_requests = FakeRequests()  # type: ignore
+    adapter.file_id = lambda item_id, name: "file-1"  # type: ignore
+    work_item = Input(adapter, "item-1")
+    work_item._files = ["orders.csv"]  # type: ignore
+    with open_file(work_item, "orders.csv") as file:
+        customers = group_by_customer(iter_order_rows(file, "orders.csv"))
+    assert list(customers) == ["Sol Heaton"]
+    (_, _), (url, options) = adapter._workitem_requests.requests  # type: ignore
+    assert url == "https://files.example.com/orders.csv"
+    assert options["stream"] is True
@@ -0,0 +1,91 @@
+"""Unit tests for connecting to a browser server. These tests do not
+need a browser, only the Playwright driver."""
+import socket
+from typing import Any, Dict, Generator, List
+
+import pytest
+
+# System under test
+from libs.web import browser_server
+
+
+@pytest.fixture
+def closed_port() -> int:
+    """A local port with nothing listening on it."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture(autouse=True)
+def no_server() -> Generator[None, None, None]:
+    """Leaves no browser server configured after each test."""
+    yield
+    browser_server.configure(None)
+
+
+def test_not_configured() -> None:
+    """Tests that no connection is attempted without an endpoint"""
+    assert browser_server.connected_browser() is None
+
+
+def test_falls_back_when_not_running(closed_port: int) -> None:
+    """Tests that a missing server is reported as unavailable"""
+    assert not browser_server.is_running(closed_port)
+    browser_server.configure(f"http://127.0.0.1:{closed_port}", timeout=2000)
+    assert browser_server.connected_browser() is None
+    # The failed connection is remembered and not attempted again.
+    assert browser_server._unavailable
+    assert browser_server.connected_browser() is None
+
+
+class FakeServerBrowser:
+    version = "1.0"
+
+    def __init__(self) -> None:
+        self.closed = False
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeChromium:
+    """A browser type which records the options it launches with."""
+
+    def __init__(self) -> None:
+        self.launches: List[Dict[str, Any]] = []
+        self.browsers: List[FakeServerBrowser] = []
+
+    def launch(self, **options: Any) -> FakeServerBrowser:
+        self.launches.append(options)
+        self.browsers.append(FakeServerBrowser())
+        return self.browsers[-1]
+
+
+class InterruptedEvent:
+    """An event whose wait is interrupted at once, as if by Ctrl+C."""
+
+    def wait(self) -> None:
+        raise KeyboardInterrupt()
+
+
+def test_serve(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Tests that the server launches a browser with a loopback CDP port
+    and closes it when interrupted"""
+    chromium = FakeChromium()
+    playwright = type("FakePlaywright", (), {"chromium": chromium})()
+    monkeypatch.setattr(browser_server.browser, "playwright", lambda: playwright)
+    monkeypatch.setattr(browser_server.browser, "install", lambda engine: None)
+    monkeypatch.setattr(browser_server.threading, "Event", InterruptedEvent)
+    monkeypatch.setattr(browser_server.signal, "signal", lambda *args: None)
+    browser_server.main(["--port", "9333"])
+    assert chromium.launches == [
+        {
+            "headless": True,
+            "args": [
+                "--remote-debugging-port=9333",
+                "--remote-debugging-address=127.0.0.1",
+            ],
+        }
+    ]
+    assert chromium.browsers[0].closed
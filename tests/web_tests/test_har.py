@@ -0,0 +1,60 @@
+"""Unit tests for the network archive. These tests use a fake browser
+context which records the routes set up on it."""
+from pathlib import Path
+from typing import Any, List, Tuple
+
+import pytest
+
+# System under test
+from libs.web.har import NetworkArchive, NetworkArchiveError, clear_archive
+
+
+class FakeContext:
+    """Records the routes set up on a browser context."""
+
+    def __init__(self) -> None:
+        self.routes: List[Tuple[str, Any, dict]] = []
+
+    def route_from_har(self, har: Path, **options: Any) -> None:
+        self.routes.append(("har", Path(har).name, options))
+
+    def route(self, url: str, handler: Any) -> None:
+        self.routes.append(("route", url, {}))
+
+
+def test_record_numbers_contexts(tmp_path: Path) -> None:
+    """Tests that each context records to its own archive"""
+    archive = NetworkArchive("record", tmp_path, name="gw0")
+    first, second = FakeContext(), FakeContext()
+    archive.attach(first)  # type: ignore
+    archive.attach(second)  # type: ignore
+    assert first.routes[0][1] == "gw0-001.har"
+    assert second.routes[0][1] == "gw0-002.har"
+    assert first.routes[0][2]["update"] is True
+
+
+def test_clear_archive(tmp_path: Path) -> None:
+    """Tests that clearing an archive removes only recordings"""
+    (tmp_path / "session-001.har").write_text("{}")
+    (tmp_path / "README.md").write_text("")
+    clear_archive(tmp_path)
+    assert [path.name for path in tmp_path.iterdir()] == ["README.md"]
+
+
+def test_replay_aborts_unknown_requests(tmp_path: Path) -> None:
+    """Tests that only the first archive aborts requests it cannot serve"""
+    for name in ("session-002.har", "session-001.har"):
+        (tmp_path / name).write_text("{}")
+    context = FakeContext()
+    NetworkArchive("replay", tmp_path, latency=20).attach(context)  # type: ignore
+    assert context.routes == [
+        ("har", "session-001.har", {"not_found": "abort"}),
+        ("har", "session-002.har", {"not_found": "fallback"}),
+        ("route", "**/*", {}),
+    ]
+
+
+def test_replay_without_archive(tmp_path: Path) -> None:
+    """Tests that replaying a missing archive is an error"""
+    with pytest.raises(NetworkArchiveError):
+        NetworkArchive("replay", tmp_path).attach(FakeContext())  # type: ignore
@@ -0,0 +1,102 @@
+"""Unit tests for the browser pool. These tests use a fake browser whose
+contexts remember their storage and pages."""
+from typing import Any, Callable, Dict, List
+
+import pytest
+
+# System under test
+from libs.web import pool as pool_module
+from libs.web.pool import BrowserPool, BrowserPoolExhaustedError
+
+
+class FakePage:
+    def __init__(self, url: str) -> None:
+        self.url = url
+
+    def is_closed(self) -> bool:
+        return False
+
+
+class FakeContext:
+    """A browser context which calls its close handlers when closed."""
+
+    def __init__(self, options: Dict[str, Any]) -> None:
+        self.options = options
+        self.pages = [FakePage("https://example.com/cart")]
+        self.closed = False
+        self._handlers: List[Callable[[Any], None]] = []
+
+    def on(self, event: str, handler: Callable[[Any], None]) -> None:
+        assert event == "close"
+        self._handlers.append(handler)
+
+    def storage_state(self) -> Dict[str, Any]:
+        return {"cookies": [{"name": "session"}], "origins": []}
+
+    def close(self) -> None:
+        self.closed = True
+        for handler in self._handlers:
+            handler(self)
+
+
+class FakeBrowser:
+    def new_context(self, **options: Any) -> FakeContext:
+        return FakeContext(options)
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    """A settable monotonic clock for the pool."""
+    now = [0.0]
+    monkeypatch.setattr(pool_module.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(BrowserPool, "browser", FakeBrowser())
+    return now
+
+
+def test_lease_limit(clock: List[float]) -> None:
+    """Tests that a full pool refuses new leases until a context closes"""
+    pool = BrowserPool(max_contexts=2, idle_timeout=None)
+    first = pool.lease(locale="en-US")
+    pool.lease()
+    assert first.options == {"locale": "en-US"}
+    with pytest.raises(BrowserPoolExhaustedError):
+        pool.lease()
+    first.close()
+    assert pool.size == 1
+    pool.lease()
+
+
+def test_idle_contexts_are_evicted(clock: List[float]) -> None:
+    """Tests that an idle context is evicted and can be restored"""
+    pool = BrowserPool(max_contexts=2, idle_timeout=60)
+    idle = pool.lease()
+    clock[0] = 30
+    busy = pool.lease()
+    clock[0] = 70
+    pool.touch(busy)
+    pool.lease()
+    assert idle.closed and not busy.closed
+    assert not pool.is_leased(idle)
+    state, url = pool.restore(idle)  # type: ignore
+    assert state["cookies"] == [{"name": "session"}]
+    assert url == "https://example.com/cart"
+    assert pool.restore(idle) is None
+
+
+def test_idle_contexts_are_evicted_on_use(clock: List[float]) -> None:
+    """Tests that using one context evicts the idle ones without a new lease"""
+    pool = BrowserPool(max_contexts=2, idle_timeout=60)
+    idle = pool.lease()
+    busy = pool.lease()
+    clock[0] = 70
+    pool.touch(busy)
+    assert idle.closed and not busy.closed
+    assert pool.size == 1
+
+
+def test_close_closes_leases(clock: List[float]) -> None:
+    """Tests that closing the pool closes every leased context"""
+    with BrowserPool() as pool:
+        contexts = [pool.lease(), pool.lease()]
+    assert all(context.closed for context in contexts)
+    assert pool.size == 0
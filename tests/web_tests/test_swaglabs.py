@@ -2,16 +2,12 @@
 
 Tests which interact with the Swag Labs website are marked as live.
 
-This module supports an environment variable file with the following
-variables:
- * BASE_URL: The base URL of the Swag Labs website, for testing a non-demo
-    website, you should set this to the site's test URL.
- * SECRET_NAME: The name of the secret in the CR vault which contains the
-    website credentials.
+The automations come from the Swag Labs fixtures of the root conftest,
+which also documents the environment variables of this module's .env
+file. Each test runs in a browser context of its own, so the tests can
+run in parallel with `pytest -n auto`.
 """
-import os
 import pytest
-from typing import Generator, Union
 
 from robocorp import vault
 
@@ -23,44 +19,6 @@ from libs.web.swaglabs import (
 )
 
 
-@pytest.fixture(scope="module")
-def credentials() -> Union[vault.SecretContainer, dict]:
-    """A vault with Swag Labs credentials.
-
-    Vault Secrets will only work if test are ran via rcc. If
-    vault secrets are not found, secrets will be loaded from
-    environment variables "USERNAME" and "PASSWORD". If those
-    are not found, a dictionary with blank strings will
-    be returned and live tests will fail.
-    """
-    try:
-        return vault.get_secret(os.environ.get("SECRET_NAME", "swaglabs"))
-    except (KeyError, vault.RobocorpVaultError):
-        pass
-    try:
-        return {
-            "username": os.environ["AUTOMATION_USERNAME"],
-            "password": os.environ["AUTOMATION_PASSWORD"],
-        }
-    except KeyError:
-        return {
-            "username": "",
-            "password": "",
-        }
-
-
-@pytest.fixture(scope="module")
-def swag() -> Generator[Swaglabs, None, None]:
-    """An instantiated Swag Labs automation class"""
-    swag = Swaglabs()
-    swag.configure(
-        base_url=os.environ.get("BASE_URL", "https://www.saucedemo.com"),
-        browser_configuration={"headless": True},
-    )
-    yield swag
-    swag.close()
-
-
 def test_swaglabs_login_error(swag: Swaglabs) -> None:
     """Tests that an error is raised with no credentials"""
     with pytest.raises(SwaglabsAuthenticationError):
@@ -74,18 +32,6 @@ def test_swaglabs_locked_out_user(swag: Swaglabs) -> None:
         swag.login(username="locked_out_user", password="secret_sauce")
 
 
-@pytest.fixture(scope="module")
-def swag_logged_in(
-    swag: Swaglabs, credentials: vault.SecretContainer
-) -> Generator[Swaglabs, None, None]:
-    """Tests that a user can login to Swag Labs"""
-    swag.login(username=credentials["username"], password=credentials["password"])
-    swag.locators.menu_button.click()
-    swag.page.get_by_role("link", name="Reset App State").click()
-    swag.page.get_by_role("button", name="Close Menu").click()
-    yield swag
-
-
 @pytest.mark.live
 def test_swaglabs_login(
     swag_logged_in: Swaglabs, credentials: vault.SecretContainer
@@ -128,3 +74,14 @@ def test_submit_order(swag_logged_in: Swaglabs) -> None:
     swag_logged_in.add_item_to_cart("Sauce Labs Backpack")
     order_number = swag_logged_in.submit_order("Test", "User", "12345")
     assert order_number is not None
+
+
+@pytest.mark.live
+def test_set_cart_applies_difference(swag_logged_in: Swaglabs) -> None:
+    """Tests that setting the cart keeps, removes and adds the right items"""
+    swag_logged_in.set_cart(["Sauce Labs Backpack", "Sauce Labs Bike Light"])
+    swag_logged_in.set_cart(["Sauce Labs Bike Light", "Sauce Labs Bolt T-Shirt"])
+    expected = ["Sauce Labs Bike Light", "Sauce Labs Bolt T-Shirt"]
+    assert sorted(swag_logged_in.cart_contents()) == expected
+    swag_logged_in.recycle(scope="page")
+    assert sorted(swag_logged_in.cart_contents()) == expected
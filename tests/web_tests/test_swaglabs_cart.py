@@ -0,0 +1,198 @@
+"""Unit tests for the Swag Labs automation class which run without a
+browser, mainly of its cart model. These tests replace the locators of
+the web site with a fake cart."""
+from typing import Any, List, Optional
+
+import pytest
+from playwright.sync_api import TimeoutError
+
+# System under test
+from libs.web.swaglabs import (
+    Swaglabs,
+    SwaglabsItemNotFoundError,
+    SwaglabsWebAppError,
+)
+
+CATALOG = ("Sauce Labs Backpack", "Sauce Labs Bike Light", "Sauce Labs Onesie")
+
+
+class FakeSite:
+    """The cart of the web site, which counts the clicks and reads done
+    on it. With drop_adds set, adding an item silently does nothing."""
+
+    def __init__(self, cart: List[str]) -> None:
+        self.cart = cart
+        self.added: List[str] = []
+        self.removed: List[str] = []
+        self.reads = 0
+        self.drop_adds = False
+
+
+class FakeButton:
+    def __init__(self, site: FakeSite, item_name: str, remove: bool) -> None:
+        self.site = site
+        self.item_name = item_name
+        self.remove = remove
+
+    def click(self) -> None:
+        if self.remove:
+            if self.item_name not in self.site.cart:
+                raise TimeoutError("no remove button")
+            self.site.cart.remove(self.item_name)
+            self.site.removed.append(self.item_name)
+        else:
+            if self.item_name not in CATALOG:
+                raise TimeoutError("no add to cart button")
+            if not self.site.drop_adds:
+                self.site.cart.append(self.item_name)
+            self.site.added.append(self.item_name)
+
+    def wait_for(self, **options: Any) -> None:
+        pass
+
+
+class FakeCartItems:
+    """The items of the cart page."""
+
+    def __init__(self, site: FakeSite, item_name: Optional[str] = None) -> None:
+        self.site = site
+        self.item_name = item_name
+
+    def filter(self, has_text: str) -> "FakeCartItems":
+        return FakeCartItems(self.site, has_text)
+
+    def locator(self, selector: str) -> "FakeCartItems":
+        return self
+
+    def all_inner_texts(self) -> List[str]:
+        self.site.reads += 1
+        return list(self.site.cart)
+
+
+class FakeVisible:
+    def is_visible(self) -> bool:
+        return True
+
+
+class FakePage:
+    def is_closed(self) -> bool:
+        return False
+
+
+class FakeContext:
+    def set_default_timeout(self, timeout: float) -> None:
+        pass
+
+
+class FakeSwaglabs(Swaglabs):
+    """A logged in Swag Labs automation whose cart is a `FakeSite`."""
+
+    def __init__(self, site: FakeSite) -> None:
+        super().__init__()
+        self.site = site
+        self._page = FakePage()  # type: ignore
+
+    @property
+    def context(self) -> Any:
+        return FakeContext()
+
+    @property
+    def locators(self) -> Swaglabs.Locators:
+        return Swaglabs.Locators(
+            inventory_container=FakeVisible(),
+            cart_items=FakeCartItems(self.site),
+        )
+
+    def is_logged_in(self) -> bool:
+        return True
+
+    def is_cart_empty(self) -> bool:
+        return not self.site.cart
+
+    def go_to_cart(self) -> None:
+        pass
+
+    def _cart_count(self) -> int:
+        return len(self.site.cart)
+
+    def _add_to_cart_button(self, item_name: str) -> Any:
+        return FakeButton(self.site, item_name, remove=False)
+
+    def _remove_button(self, cart_item: Any) -> Any:
+        return FakeButton(self.site, cart_item.item_name, remove=True)
+
+
+def test_set_cart_fills_partly_filled_cart() -> None:
+    """Tests that only the items which differ are removed and added"""
+    site = FakeSite(["Sauce Labs Backpack", "Sauce Labs Bike Light"])
+    swag = FakeSwaglabs(site)
+    swag.set_cart(["Sauce Labs Bike Light", "Sauce Labs Onesie"])
+    assert site.removed == ["Sauce Labs Backpack"]
+    assert site.added == ["Sauce Labs Onesie"]
+    assert swag.cart_contents() == ["Sauce Labs Bike Light", "Sauce Labs Onesie"]
+    assert site.reads == 1
+
+
+def test_set_cart_empties_over_filled_cart() -> None:
+    """Tests that unwanted items are removed and wanted ones kept"""
+    site = FakeSite(list(CATALOG))
+    swag = FakeSwaglabs(site)
+    swag.set_cart(["Sauce Labs Bike Light", "Sauce Labs Bike Light"])
+    assert site.removed == ["Sauce Labs Backpack", "Sauce Labs Onesie"]
+    assert site.added == []
+    assert site.cart == ["Sauce Labs Bike Light"]
+
+
+def test_set_cart_uses_model() -> None:
+    """Tests that the cart is not read again while the model is known"""
+    site = FakeSite(["Sauce Labs Backpack"])
+    swag = FakeSwaglabs(site)
+    swag.set_cart(["Sauce Labs Backpack"])
+    swag.set_cart(["Sauce Labs Onesie"])
+    assert site.reads == 1
+    assert site.cart == ["Sauce Labs Onesie"]
+
+
+def test_set_cart_rereads_stale_model() -> None:
+    """Tests that the cart is read again once the page is replaced"""
+    site = FakeSite([])
+    swag = FakeSwaglabs(site)
+    swag.set_cart(["Sauce Labs Backpack"])
+    site.cart.append("Sauce Labs Onesie")
+    swag._page = FakePage()  # type: ignore
+    swag.set_cart(["Sauce Labs Backpack"])
+    assert site.reads == 1
+    assert site.removed == ["Sauce Labs Onesie"]
+    assert site.cart == ["Sauce Labs Backpack"]
+
+
+def test_set_cart_count_mismatch_forgets_model() -> None:
+    """Tests that the model is forgotten if the cart count is wrong"""
+    site = FakeSite([])
+    swag = FakeSwaglabs(site)
+    site.drop_adds = True
+    with pytest.raises(SwaglabsWebAppError):
+        swag.set_cart(["Sauce Labs Backpack"])
+    assert swag._known_cart() is None
+
+
+def test_remove_error_forgets_model() -> None:
+    """Tests that the model is forgotten if an item cannot be removed"""
+    site = FakeSite(["Sauce Labs Backpack"])
+    swag = FakeSwaglabs(site)
+    assert swag.cart_contents() == ["Sauce Labs Backpack"]
+    site.cart.clear()
+    with pytest.raises(SwaglabsItemNotFoundError):
+        swag.set_cart([])
+    assert swag._known_cart() is None
+    assert swag.cart_contents() == []
+
+
+def test_swaglabs_invalid_locator_profile() -> None:
+    """Tests that an unknown locator profile is rejected"""
+    swag = FakeSwaglabs(FakeSite([]))
+    swag.configure_locators("robust")
+    assert swag.locator_profile == "robust"
+    with pytest.raises(ValueError):
+        swag.configure_locators("xpath")
+    assert swag.locator_profile == "robust"
@@ -0,0 +1,71 @@
+"""Unit tests for the web action watchdog. These tests use a plain
+asyncio loop in place of the Playwright event loop."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Any, Callable, Generator
+
+import pytest
+
+# System under test
+from libs.web.watchdog import ActionWatchdog, playwright_loop
+
+
+@pytest.fixture
+def loop() -> Generator[asyncio.AbstractEventLoop, None, None]:
+    """A fresh event loop. It is run in another thread by `_in_thread`,
+    since the Playwright sync API leaves its own loop marked as running
+    in the main thread once another test used it."""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+def _in_thread(function: Callable[[], Any]) -> Any:
+    """Runs a function in a new thread and returns its result or raises
+    its exception."""
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(function).result()
+
+
+def _playwright_call(loop: asyncio.AbstractEventLoop, seconds: float) -> asyncio.Task:
+    """Creates a task tagged the way the Playwright sync API tags its calls."""
+    task = loop.create_task(asyncio.sleep(seconds))
+    setattr(task, "__pw_stack__", [])
+    return task
+
+
+def _watched_call(
+    watchdog: ActionWatchdog, loop: asyncio.AbstractEventLoop, seconds: float
+) -> None:
+    with watchdog.watch("action", loop):
+        loop.run_until_complete(_playwright_call(loop, seconds))
+
+
+def test_watchdog_cancels_hung_action(loop: asyncio.AbstractEventLoop) -> None:
+    """Tests that an action past the deadline is cancelled"""
+    watchdog = ActionWatchdog(0.2)
+    with pytest.raises(asyncio.CancelledError):
+        _in_thread(lambda: _watched_call(watchdog, loop, 10))
+    assert watchdog.fired
+
+
+def test_watchdog_ignores_fast_action(loop: asyncio.AbstractEventLoop) -> None:
+    """Tests that an action within the deadline is left alone"""
+    watchdog = ActionWatchdog(5)
+    _in_thread(lambda: _watched_call(watchdog, loop, 0.01))
+    assert not watchdog.fired
+    assert watchdog.action is None
+
+
+def test_playwright_loop(loop: asyncio.AbstractEventLoop) -> None:
+    """Tests that the loop of a Playwright object is found if it has one"""
+    api_object = SimpleNamespace(_loop=loop)
+    assert playwright_loop(api_object) is loop
+    assert playwright_loop(SimpleNamespace()) is None
+
+
+def test_watchdog_rejects_invalid_deadline() -> None:
+    """Tests that the deadline must be positive"""
+    with pytest.raises(ValueError):
+        ActionWatchdog(0)
@@ -0,0 +1,337 @@
+"""Unit tests for the browser lifecycle of the web automation base class.
+These tests use a fake browser whose contexts and pages only record what
+is done with them."""
+import asyncio
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Generator, Iterator, List, Optional, Set
+
+import pytest
+
+# System under test
+import libs.web as web
+from libs.web import WebActionHungError, WebAutomationBase, web_action
+
+
+class FakePage:
+    """A page which remembers its URL. Going to a URL with "hang" in it
+    is cancelled as if it hung."""
+
+    _loop: Any = None
+
+    def __init__(self) -> None:
+        self.url = "about:blank"
+        self.closed = False
+
+    def goto(self, url: str) -> None:
+        if "hang" in url:
+            raise asyncio.CancelledError()
+        self.url = url
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    def close(self) -> None:
+        self.closed = True
+
+
+class FakeTracing:
+    """Tracing which writes a file for each chunk stopped with a path."""
+
+    def __init__(self) -> None:
+        self.started = False
+        self.chunk: Optional[str] = None
+
+    def start(self, **options: Any) -> None:
+        self.started = True
+
+    def start_chunk(self, title: str) -> None:
+        assert self.started
+        self.chunk = title
+
+    def stop_chunk(self, path: Optional[Path] = None) -> None:
+        assert self.chunk is not None
+        if path is not None:
+            Path(path).write_text(self.chunk)
+        self.chunk = None
+
+
+class FakeContext:
+    """A browser context which records its options and pages."""
+
+    def __init__(self, **options: Any) -> None:
+        self.options = options
+        self.pages: List[FakePage] = []
+        self.closed = False
+        self.hung = False
+        self.tracing = FakeTracing()
+
+    def new_page(self) -> FakePage:
+        page = FakePage()
+        self.pages.append(page)
+        return page
+
+    def set_default_timeout(self, timeout: float) -> None:
+        self.timeout = timeout
+
+    def storage_state(self) -> Dict[str, Any]:
+        assert not self.hung, "the hung context was read"
+        return {"cookies": [{"name": "session"}], "origins": []}
+
+    def close(self) -> None:
+        self.closed = True
+        for page in self.pages:
+            page.closed = True
+
+
+class FakeBrowser:
+    def new_context(self, **options: Any) -> FakeContext:
+        return FakeContext(**options)
+
+
+class FakeAutomation(WebAutomationBase):
+    """An automation which owns a context of the fake browser."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.logins = 0
+        self.fake_browser = FakeBrowser()
+        self._context = self.fake_browser.new_context()  # type: ignore
+        self.configure()
+
+    def configure(self, *args: Any, **kwargs: Any) -> None:
+        super().configure(*args, **kwargs)
+
+    @property
+    def browser(self) -> Any:
+        return self.fake_browser
+
+    @property
+    def locators(self) -> WebAutomationBase.Locators:
+        return self.Locators()
+
+    def is_logged_in(self) -> bool:
+        return False
+
+    def login(self, username: Any = None, password: Any = None) -> None:
+        self.logins += 1
+
+    def logout(self) -> None:
+        pass
+
+    @web_action
+    def url(self) -> str:
+        return self.page.url
+
+    @web_action
+    def hang(self) -> None:
+        self.context.hung = True  # type: ignore
+        raise asyncio.CancelledError()
+
+
+class FakeWatchdog:
+    """A watchdog which fires for the actions named in hangs."""
+
+    deadline = 1.0
+
+    def __init__(self, hangs: Set[str]) -> None:
+        self.hangs = hangs
+        self.fired = False
+        self.watched: List[str] = []
+
+    @contextmanager
+    def watch(self, action: str, loop: asyncio.AbstractEventLoop) -> Iterator[None]:
+        self.watched.append(action)
+        self.fired = action in self.hangs
+        yield
+
+
+@pytest.fixture
+def memory(monkeypatch: pytest.MonkeyPatch) -> List[float]:
+    """A settable memory use in MB, in place of the process memory."""
+    memory_mb = [100.0]
+    monkeypatch.setattr(web, "process_memory_mb", lambda: memory_mb[0])
+    return memory_mb
+
+
+@pytest.fixture
+def automation(memory: List[float]) -> FakeAutomation:
+    """An automation on a page of the fake web site."""
+    automation = FakeAutomation()
+    automation.page.goto("https://example.com/cart")
+    return automation
+
+
+def test_recycle_after_work_items(automation: FakeAutomation) -> None:
+    """Tests that the page is recycled after the configured work items"""
+    automation.configure_recycling(after_work_items=2)
+    page = automation.page
+    automation.work_item_completed()
+    assert automation.page is page
+    automation.work_item_completed()
+    assert page.closed
+    assert automation.page is not page
+    assert automation.page.url == "https://example.com/cart"
+    automation.work_item_completed()
+    assert not automation.page.closed
+
+
+def test_recycle_above_memory_watermark(
+    automation: FakeAutomation, memory: List[float]
+) -> None:
+    """Tests that the page is recycled when memory use passes the watermark"""
+    automation.configure_recycling(rss_watermark_mb=500)
+    page = automation.page
+    automation.work_item_completed()
+    assert automation.page is page
+    memory[0] = 600
+    automation.work_item_completed()
+    assert page.closed and automation.page is not page
+
+
+def test_recycle_page_keeps_context(automation: FakeAutomation) -> None:
+    """Tests that recycling the page keeps the context"""
+    context = automation.context
+    automation.recycle(scope="page")
+    assert automation.context is context and not context.closed
+    assert len(context.pages) == 2
+
+
+def test_recycle_context_restores_session(automation: FakeAutomation) -> None:
+    """Tests that recycling the context carries over its storage and URL"""
+    context = automation.context
+    automation.recycle(scope="context")
+    new_context = automation.context
+    assert context.closed and new_context is not context
+    assert new_context.options["storage_state"]["cookies"] == [{"name": "session"}]
+    assert new_context.timeout == automation.timeout
+    assert automation.page.url == "https://example.com/cart"
+
+
+def test_recycle_context_closes_global_context(
+    automation: FakeAutomation, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Tests that recycling closes the context of robocorp.browser when
+    the automation does not own its context"""
+    global_context = FakeContext()
+    global_page = global_context.new_page()
+    monkeypatch.setattr(web.browser, "context", lambda: global_context)
+    monkeypatch.setattr(web.browser, "page", lambda: global_page)
+    automation._context = None
+    automation._page = None
+    automation.recycle(scope="context")
+    assert global_context.closed
+    assert automation.context is not global_context
+
+
+def test_recycle_without_restoring_url(automation: FakeAutomation) -> None:
+    """Tests that the new page can be left blank"""
+    automation.recycle(scope="context", restore_url=False)
+    assert automation.page.url == "about:blank"
+
+
+def test_recycling_rejects_invalid_scope(automation: FakeAutomation) -> None:
+    """Tests that only pages and contexts can be recycled"""
+    with pytest.raises(ValueError):
+        automation.configure_recycling(after_work_items=1, scope="browser")
+
+
+def test_process_memory_mb() -> None:
+    """Tests that the memory use of this process is measured"""
+    assert web.process_memory_mb() > 1
+
+
+@pytest.fixture
+def loop(monkeypatch: pytest.MonkeyPatch) -> Generator[Any, None, None]:
+    """An event loop, set as the loop of the fake pages."""
+    loop = asyncio.new_event_loop()
+    monkeypatch.setattr(FakePage, "_loop", loop)
+    yield loop
+    loop.close()
+
+
+def test_hung_action_rebuilds_context(automation: FakeAutomation, loop: Any) -> None:
+    """Tests that a hung action moves to a new context without reading
+    the hung one"""
+    automation.configure(base_url="https://example.com/")
+    automation._watchdog = FakeWatchdog({"hang"})  # type: ignore
+    hung_context = automation.context
+    with pytest.raises(WebActionHungError):
+        automation.hang()
+    assert hung_context.closed
+    assert "storage_state" not in automation.context.options
+    assert automation.page.url == "https://example.com/"
+    assert automation._watchdog.watched == ["hang", "hang recovery"]
+
+
+def test_hung_recovery_is_cancelled(automation: FakeAutomation, loop: Any) -> None:
+    """Tests that a recovery which hangs too is given up on"""
+    automation.configure(base_url="https://hang.example.com/")
+    automation._watchdog = FakeWatchdog({"hang", "hang recovery"})  # type: ignore
+    hung_page = automation.page
+    with pytest.raises(WebActionHungError):
+        automation.hang()
+    assert hung_page.closed and not automation.page.closed
+
+
+def test_session_restored_after_hung_recovery(
+    automation: FakeAutomation, loop: Any
+) -> None:
+    """Tests that the next action logs back in after a recovery hung"""
+    automation.configure(username="user", base_url="https://hang.example.com/")
+    automation._watchdog = FakeWatchdog({"hang", "hang recovery"})  # type: ignore
+    with pytest.raises(WebActionHungError):
+        automation.hang()
+    assert automation.logins == 0
+    automation.configure(base_url="https://example.com/")
+    automation._watchdog = FakeWatchdog(set())  # type: ignore
+    assert automation.url() == "https://example.com/"
+    assert automation.logins == 1
+    assert automation._watchdog.watched == ["url session restore", "url"]
+    automation.url()
+    assert automation.logins == 1
+
+
+def test_trace_discarded_on_success(automation: FakeAutomation, tmp_path: Path) -> None:
+    """Tests that the trace of a successful work item is not kept"""
+    automation.configure_tracing(tmp_path)
+    with automation.trace_work_item("item-1"):
+        pass
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_trace_kept_on_failure(automation: FakeAutomation, tmp_path: Path) -> None:
+    """Tests that the trace of a failed work item is written"""
+    automation.configure_tracing(tmp_path)
+    with pytest.raises(RuntimeError):
+        with automation.trace_work_item("item-2"):
+            raise RuntimeError("failed")
+    assert (tmp_path / "trace-item-2.zip").read_text() == "item-2"
+
+
+def test_trace_dropped_on_hang_recovery(
+    automation: FakeAutomation, loop: Any, tmp_path: Path
+) -> None:
+    """Tests that the trace of a hung work item is dropped without
+    calling the hung context"""
+    automation.configure_tracing(tmp_path)
+    automation._watchdog = FakeWatchdog({"hang"})  # type: ignore
+    hung_context = automation.context
+    with pytest.raises(WebActionHungError):
+        with automation.trace_work_item("item-3"):
+            automation.hang()
+    assert hung_context.tracing.chunk == "item-3"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_trace_saved_on_recycle_discarded_on_success(
+    automation: FakeAutomation, tmp_path: Path
+) -> None:
+    """Tests that a trace saved when the context was recycled is deleted
+    if the work item succeeds after all"""
+    automation.configure_tracing(tmp_path)
+    with automation.trace_work_item("item-4"):
+        automation.recycle(scope="context")
+        assert (tmp_path / "trace-item-4.zip").exists()
+    assert list(tmp_path.iterdir()) == []